@@ -0,0 +1,236 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+import tempfile
+import argparse
+import tracemalloc
+
+import pyarrow as pa
+
+from data_io import artifact_path, read_frame, write_frame
+from instrumentation import RssSampler
+from synthetic_data import write_synthetic_csv
+import data_ingestion
+import data_preprocessing
+import feature_engineering
+import model_building
+import model_evaluation
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('benchmark')
+
+# the fast-start scoring entry point timed by benchmark_startup
+SCORE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'score.py')
+# timings score.py --timings reports, plus the process wall time measured here
+STARTUP_TIMINGS = ['process_s', 'import_s', 'load_s', 'first_prediction_s', 'total_s']
+
+
+class MemorySampler(RssSampler):
+    """
+    Peak RSS and peak Arrow memory pool usage while a function runs. tracemalloc
+    only sees allocations made through Python's allocator; Arrow buffers (pyarrow's
+    CSV reader, Parquet I/O, to_pandas) bypass it. The pool is sampled with the RSS
+    (see instrumentation.RssSampler).
+    """
+
+    def _sample(self) -> None:
+        super()._sample()
+        self.arrow_peak = max(self.arrow_peak, pa.total_allocated_bytes() / 2 ** 20)
+
+    def __enter__(self) -> 'MemorySampler':
+        self.arrow_start = self.arrow_peak = pa.total_allocated_bytes() / 2 ** 20
+        return super().__enter__()
+
+    def as_dict(self) -> dict:
+        return {
+            'rss_peak_mb': self.rss_peak_mb,
+            'arrow_peak_mb': self.arrow_peak - self.arrow_start,
+            'arrow_pool_max_mb': pa.default_memory_pool().max_memory() / 2 ** 20,
+        }
+
+
+# timing one stage function
+def measure(stage: str, n_rows: int, func, *args, **kwargs):
+    """
+    Run func(*args, **kwargs) once and return (result, record) where record holds
+    wall time, rows/sec and memory: rss_peak_mb is the peak RSS above the RSS at the
+    start (everything, Arrow included), arrow_peak_mb the peak Arrow pool allocation
+    above its start, python_peak_mb the tracemalloc peak (Python/NumPy allocations
+    only). arrow_pool_max_mb is the pool's high-water mark over the whole process.
+    """
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        wall_time = time.perf_counter() - start
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+    record = {
+        'stage': stage,
+        'rows': n_rows,
+        'wall_time_s': wall_time,
+        'rows_per_sec': n_rows / wall_time if wall_time > 0 else None,
+        **memory.as_dict(),
+        'python_peak_mb': peak_memory / 2 ** 20,
+    }
+    logger.debug('%-20s %10d rows  %8.3f s  %12.0f rows/s  RSS +%7.1f MB  Arrow %7.1f MB  traced %7.1f MB',
+                 stage, n_rows, wall_time, record['rows_per_sec'] or 0, record['rss_peak_mb'] or 0,
+                 record['arrow_peak_mb'], record['python_peak_mb'])
+    return result, record
+
+
+# benchmarking every stage function for one dataset size
+def benchmark_size(n_rows: int, params: dict, work_dir: str) -> list:
+    """Generate n_rows synthetic passengers and time each stage function on them."""
+    try:
+        bench_params = params['benchmark']
+        data_format = params['data_format']
+        raw_path = os.path.join(work_dir, f'synthetic_{n_rows}.csv')
+        write_synthetic_csv(raw_path, n_rows, seed=bench_params['seed'])
+        records = []
+        # tracing only starts once the input exists, it slows the generator down a lot
+        tracemalloc.start()
+
+        df, record = measure('load_data', n_rows, data_ingestion.load_data, raw_path)
+        records.append(record)
+        os.remove(raw_path)
+        train_df, test_df = data_ingestion.split_data(df, params['data_ingestion'])
+        del df
+
+        preprocessor = data_preprocessing.Preprocessor().fit(train_df)
+        (train_df, test_df), record = measure(
+            'preprocess_df', n_rows,
+            lambda: (data_preprocessing.preprocess_df(train_df, preprocessor),
+                     data_preprocessing.preprocess_df(test_df, preprocessor)))
+        records.append(record)
+
+        engineer = feature_engineering.FeatureEngineer().fit(train_df)
+        (train_df, test_df), record = measure(
+            'engineer_df', n_rows,
+            lambda: (feature_engineering.engineer_df(train_df, engineer),
+                     feature_engineering.engineer_df(test_df, engineer)))
+        records.append(record)
+
+        frame_path = artifact_path(work_dir, f'train_{n_rows}', data_format)
+        _, record = measure(f'save_data[{data_format}]', len(train_df), write_frame, train_df, frame_path)
+        records.append(record)
+        train_df, record = measure(f'load_frame[{data_format}]', len(train_df), read_frame, frame_path)
+        records.append(record)
+        os.remove(frame_path)
+
+        model, record = measure('train_model', len(train_df), model_building.train_model,
+                                train_df, params['model_building'])
+        records.append(record)
+
+        features = list(model.feature_names_in_)
+        _, record = measure('evaluate_model', len(test_df), model_evaluation.evaluate_model,
+                            model, test_df[features], test_df['Survived'])
+        records.append(record)
+        return records
+    except Exception as e:
+        logger.error('Benchmark failed for %d rows: %s', n_rows, e)
+        raise
+    finally:
+        tracemalloc.stop()
+
+
+# cold-start timings of the scoring entry point
+def benchmark_startup(startup_params: dict, seed: int, work_dir: str) -> list:
+    """
+    Run score.py in a new Python process `repeats` times per configured model on a
+    small synthetic file. Records the median process wall time and the import, model
+    load and first prediction times score.py reports; `regression` is set when the
+    process time exceeds the model's budget (max_start_s, None for no budget).
+    """
+    try:
+        input_path = os.path.join(work_dir, 'startup.csv')
+        write_synthetic_csv(input_path, startup_params['rows'], seed=seed)
+        records = []
+        for model_path, max_start_s in startup_params['models'].items():
+            if not os.path.exists(model_path):
+                logger.warning('Skipping the start-up benchmark of %s, it does not exist', model_path)
+                continue
+            runs = []
+            for _ in range(startup_params['repeats']):
+                timings_path = os.path.join(work_dir, 'timings.json')
+                start = time.perf_counter()
+                subprocess.run([sys.executable, SCORE_SCRIPT, input_path, '--model', model_path,
+                                '--output', os.path.join(work_dir, 'scores.csv'), '--timings', timings_path],
+                               check=True)
+                process_s = time.perf_counter() - start
+                with open(timings_path, 'r') as file:
+                    runs.append({'process_s': process_s, **json.load(file)})
+            record = {
+                'stage': f'startup[{os.path.basename(model_path)}]',
+                'rows': startup_params['rows'],
+                'repeats': startup_params['repeats'],
+                **{name: float(np.median([run[name] for run in runs])) for name in STARTUP_TIMINGS},
+                'max_start_s': max_start_s,
+            }
+            record['regression'] = max_start_s is not None and record['process_s'] > max_start_s
+            logger.debug('%-20s process %.3f s  import %.3f s  load %.3f s  first prediction %.3f s',
+                         record['stage'], record['process_s'], record['import_s'], record['load_s'],
+                         record['first_prediction_s'])
+            records.append(record)
+        return records
+    except Exception as e:
+        logger.error('Start-up benchmark failed: %s', e)
+        raise
+
+
+def main():
+    """Time every stage on synthetic data of each configured size and save a JSON report"""
+    configure_logging('benchmark')
+    try:
+        params = data_ingestion.load_params('params.yaml')
+        bench_params = params['benchmark']
+
+        parser = argparse.ArgumentParser(description='Pipeline stage benchmark')
+        parser.add_argument('--rows', type=int, nargs='+', default=bench_params['rows'], help='dataset sizes')
+        parser.add_argument('--output', default=bench_params['output_path'], help='JSON report path')
+        parser.add_argument('--startup-only', action='store_true', help='only the score.py cold-start benchmark')
+        args = parser.parse_args()
+
+        report = {
+            'environment': {
+                'python': sys.version.split()[0],
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'data_format': params['data_format'],
+                'seed': bench_params['seed'],
+            },
+            'results': [],
+            'startup': [],
+        }
+        work_dir = tempfile.mkdtemp(prefix='titanic-bench-')
+        try:
+            if not args.startup_only:
+                for n_rows in args.rows:
+                    report['results'].extend(benchmark_size(n_rows, params, work_dir))
+            report['startup'] = benchmark_startup(bench_params['startup'], bench_params['seed'], work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug('Benchmark report saved to %s', args.output)
+
+        regressions = [record['stage'] for record in report['startup'] if record['regression']]
+        if regressions:
+            raise RuntimeError(f'Start-up time over budget: {", ".join(regressions)}')
+    except Exception as e:
+        logger.error('Benchmark run failed: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,21 @@
 import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
 import os
-import logging
 import yaml
+import json
+import shutil
+import tempfile
+import urllib.request
+import urllib.parse
+from data_io import FrameWriter, artifact_path, read_csv_typed, write_frame
+from instrumentation import StageMonitor
+from model_files import file_sha256
+from schema import RAW_SCHEMA, arrow_types, csv_dtypes, drop_unused_categories, enforce_schema
+from log_config import configure_logging, get_logger
 
-# Ensure "logs" directory exist
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
-
-
-# logging configuration
-logger = logging.getLogger('data_ingestion')
-logger.setLevel(logging.DEBUG)
-
-# setting console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-
-# setting file handler
-log_file_path = os.path.join(log_dir, 'data_ingestion.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-
-# defining and setting formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-# adding handling object
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
-
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('data_ingestion')
 
 
 # method to load params from params.yaml
@@ -53,11 +37,149 @@ def load_params(params_path: str) -> dict:
         raise
 
 
+def _local_path(location: str):
+    """Return the filesystem path of a local/file:// location, None for remote URLs."""
+    parsed = urllib.parse.urlparse(location)
+    if parsed.scheme == 'file':
+        return urllib.request.url2pathname(parsed.path)
+    if parsed.scheme == '' or len(parsed.scheme) == 1:
+        # plain path (a one letter scheme is a Windows drive)
+        return location
+    return None
+
+
+def _load_cache_index(cache_dir: str) -> dict:
+    index_path = os.path.join(cache_dir, 'index.json')
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r') as file:
+        return json.load(file)
+
+
+def _save_cache_index(cache_dir: str, index: dict) -> None:
+    # write to a temp file first so a crash never leaves a half written index
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.json')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(index, file, indent=4)
+    os.replace(tmp_path, os.path.join(cache_dir, 'index.json'))
+
+
+def _blob_is_valid(blob_path: str, sha256: str, entry: dict) -> bool:
+    """Trust a cached blob whose size/mtime match the index, rehash it otherwise."""
+    if not os.path.exists(blob_path):
+        return False
+    stat = os.stat(blob_path)
+    if entry.get('sha256') == sha256 and entry.get('size') == stat.st_size \
+            and entry.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    return file_sha256(blob_path) == sha256
+
+
+def _source_stat(url: str) -> dict:
+    """Size and mtime of a local/file:// source, None for remote or missing ones."""
+    local_path = _local_path(url)
+    if local_path is None or not os.path.exists(local_path):
+        return None
+    stat = os.stat(local_path)
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+
+def _store_blob(cache_dir: str, fill_blob, expected_sha256: str = None) -> tuple:
+    """
+    Write a blob through fill_blob(file) into a temp file, hash it, verify it against
+    expected_sha256 and move it to blobs/<sha256>. Returns (sha256, blob_path).
+    """
+    blob_dir = os.path.join(cache_dir, 'blobs')
+    os.makedirs(blob_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            fill_blob(file)
+        sha256 = file_sha256(tmp_path)
+        if expected_sha256 and sha256 != expected_sha256:
+            raise ValueError(f'Checksum mismatch: expected {expected_sha256}, got {sha256}')
+        blob_path = os.path.join(blob_dir, sha256)
+        os.replace(tmp_path, blob_path)
+        return sha256, blob_path
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# resolving the dataset to a local, verified file
+def resolve_source(url: str, cache_dir: str, sha256: str = None, mirrors: list = None) -> str:
+    """
+    Return a local path holding the bytes of `url`.
+    Lookup order: cached blob (content addressed by SHA-256), local mirrors and
+    file:// sources, then the network. The index maps every url to its digest,
+    so a warm cache needs neither network I/O nor rehashing. Without a pinned
+    sha256 a local source is compared with the size/mtime recorded in the index
+    and copied again when it changed (e.g. rows were appended).
+    """
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        index = _load_cache_index(cache_dir)
+        entry = index.get(url, {})
+        expected = sha256 or entry.get('sha256')
+        source_stat = _source_stat(url)
+        source_changed = sha256 is None and source_stat is not None \
+            and any(entry.get(key) != value for key, value in source_stat.items())
+
+        if expected and not source_changed:
+            blob_path = os.path.join(cache_dir, 'blobs', expected)
+            if _blob_is_valid(blob_path, expected, entry):
+                logger.debug('Using cached copy of %s: %s', url, blob_path)
+                return blob_path
+        if source_changed and expected:
+            logger.debug('%s changed since it was cached, copying it again', url)
+
+        blob = None
+        locations = list(mirrors or []) + [url]
+        if sha256 is None and source_stat is not None:
+            # an unpinned local source is the newest copy, mirrors may hold an older one
+            locations = [url] + list(mirrors or [])
+        for location in locations:
+            local_path = _local_path(location)
+            if local_path is None:
+                continue
+            if not os.path.exists(local_path):
+                logger.debug('Mirror not available: %s', location)
+                continue
+            try:
+                with open(local_path, 'rb') as source:
+                    blob = _store_blob(cache_dir, lambda file: shutil.copyfileobj(source, file), sha256)
+                logger.debug('Copied %s into the dataset cache', location)
+                break
+            except ValueError as e:
+                logger.warning('Skipping mirror %s: %s', location, e)
+
+        if blob is None:
+            if _local_path(url) is not None:
+                raise FileNotFoundError(f'No valid copy of {url} found')
+            logger.debug('Downloading %s', url)
+            with urllib.request.urlopen(url) as response:
+                blob = _store_blob(cache_dir, lambda file: shutil.copyfileobj(response, file), sha256)
+
+        digest, blob_path = blob
+        stat = os.stat(blob_path)
+        index[url] = {'sha256': digest, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **(source_stat or {})}
+        _save_cache_index(cache_dir, index)
+        logger.debug('Dataset %s cached as %s', url, blob_path)
+        return blob_path
+    except Exception as e:
+        logger.error('Failed to resolve dataset source %s: %s', url, e)
+        raise
+
+
 # loading data from path
 def load_data(data_url: str) -> pd.DataFrame:
-    """Loading data from a CSV file."""
+    """Loading data from a CSV file with the compact dtypes of schema.RAW_SCHEMA."""
     try:
-        df = pd.read_csv(data_url)
+        # failing on a missing column before parsing anything
+        enforce_schema(pd.read_csv(data_url, nrows=0), RAW_SCHEMA)
+        # undeclared columns are never parsed, strings are dictionary encoded while parsing
+        df = read_csv_typed(data_url, list(RAW_SCHEMA), arrow_types(RAW_SCHEMA))
+        df = enforce_schema(df, RAW_SCHEMA)
         logger.debug('Data loaded successfully from %s', data_url)
         return df
     except pd.errors.ParserError as e:
@@ -67,31 +189,126 @@ def load_data(data_url: str) -> pd.DataFrame:
         logger.error('Unexpected error occured while loading the data: %s', e)
         raise
 
-# saving data to CSV file
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
-    """Preprocess the data"""
+# saving data to CSV/Parquet file
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, data_format: str = 'csv') -> None:
+    """Save the train and test splits in the configured data format"""
     try:
         raw_data_path = os.path.join(data_path, 'raw')
         os.makedirs(raw_data_path, exist_ok=True)
-        train_data.to_csv(os.path.join(raw_data_path, 'train.csv'), index=False)
-        test_data.to_csv(os.path.join(raw_data_path, 'test.csv'), index=False)
+        write_frame(train_data, artifact_path(raw_data_path, 'train', data_format))
+        write_frame(test_data, artifact_path(raw_data_path, 'test', data_format))
         logger.debug('Train and Test data saved to %s', raw_data_path)
     except Exception as e:
         logger.error('Unexpected error occured while saving data: %s', e)
         raise
 
+# deciding the split of every row from its id
+def hash_split_mask(ids: pd.Series, test_size: float, seed: int) -> np.ndarray:
+    """
+    Return True for the rows that belong to the test split.
+    Each id is hashed together with the seed into a uniform number in [0, 1),
+    so a row always lands in the same split no matter how the file is chunked.
+    hash_pandas_object only keys the hash of strings, so for numeric ids the seed
+    is mixed in here: a seed-derived key is xor-ed into the row hashes, followed
+    by the splitmix64 finalizer.
+    """
+    hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+    key = np.random.SeedSequence(seed).generate_state(1, dtype=np.uint64)[0]
+    mixed = hashes ^ key
+    mixed ^= mixed >> np.uint64(30)
+    mixed *= np.uint64(0xBF58476D1CE4E5B9)
+    mixed ^= mixed >> np.uint64(27)
+    mixed *= np.uint64(0x94D049BB133111EB)
+    mixed ^= mixed >> np.uint64(31)
+    uniform = (mixed >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+    return uniform < test_size
+
+
+# splitting an in-memory frame the same way the configured ingestion mode does
+def split_data(df: pd.DataFrame, params: dict) -> tuple:
+    """Return (train, test): hash based split in streaming mode, train_test_split otherwise."""
+    try:
+        if params['streaming']:
+            test_mask = hash_split_mask(df['PassengerId'], params['test_size'], params['random_state'])
+            train_df, test_df = df[~test_mask], df[test_mask]
+        else:
+            train_df, test_df = train_test_split(df, test_size=params['test_size'], random_state=params['random_state'])
+        return drop_unused_categories(train_df), drop_unused_categories(test_df)
+    except Exception as e:
+        logger.error('Error occured during train/test split: %s', e)
+        raise
+
+
+# streaming the source into the train/test files chunk by chunk
+def ingest_streaming(data_url: str, data_path: str, test_size: float, seed: int,
+                     chunk_size: int, data_format: str = 'csv') -> tuple:
+    """
+    Split the source by hashed PassengerId and append each chunk to disk as it is read.
+    Returns the number of (train, test) rows written.
+    """
+    try:
+        raw_data_path = os.path.join(data_path, 'raw')
+        with FrameWriter(artifact_path(raw_data_path, 'train', data_format)) as train_writer, \
+                FrameWriter(artifact_path(raw_data_path, 'test', data_format)) as test_writer:
+            for chunk in pd.read_csv(data_url, chunksize=chunk_size, usecols=lambda column: column in RAW_SCHEMA,
+                                     dtype=csv_dtypes(RAW_SCHEMA)):
+                chunk = enforce_schema(chunk, RAW_SCHEMA)
+                test_mask = hash_split_mask(chunk['PassengerId'], test_size, seed)
+                train_writer.write(chunk[~test_mask])
+                test_writer.write(chunk[test_mask])
+        logger.debug('Streamed %d train and %d test rows to %s',
+                     train_writer.rows_written, test_writer.rows_written, raw_data_path)
+        return train_writer.rows_written, test_writer.rows_written
+    except pd.errors.ParserError as e:
+        logger.error('Failed to parse the CSV file: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error occured during streaming ingestion: %s', e)
+        raise
+
 def main():
+    configure_logging('data_ingestion')
     try:
-        params = load_params('params.yaml')['data_ingestion']
+        monitor = StageMonitor('data_ingestion')
+        all_params = load_params('params.yaml')
+        params = all_params['data_ingestion']
         test_size = params['test_size']
-        # fetching data from the git/Dataset for remote access
-        data_path = "https://raw.githubusercontent.com/JishnudipSaha/Datasets/refs/heads/main/Titanic-Dataset.csv"
-        df = load_data(data_url=data_path)
-        train_data, test_data = train_test_split(df, test_size=test_size, random_state=42)
-        save_data(train_data=train_data, test_data=test_data, data_path='./data')
+        random_state = params['random_state']
+        data_format = all_params['data_format']
+        train_path = artifact_path('./data/raw', 'train', data_format)
+        test_path = artifact_path('./data/raw', 'test', data_format)
+        # fetching data from the git/Dataset, through the local cache and mirrors
+        with monitor.track('resolve_source'):
+            data_path = resolve_source(**params['source'])
+        if params['streaming']:
+            # bounded memory: hash based split, written chunk by chunk
+            with monitor.track('ingest_streaming') as m:
+                n_train, n_test = ingest_streaming(data_url=data_path, data_path='./data', test_size=test_size,
+                                                   seed=random_state, chunk_size=params['chunk_size'],
+                                                   data_format=data_format)
+                m.read(data_path)
+                m.wrote(train_path)
+                m.wrote(test_path)
+                m.rows_in = m.rows_out = n_train + n_test
+        else:
+            with monitor.track('load_data') as m:
+                df = load_data(data_url=data_path)
+                m.read(data_path)
+                m.rows_out = len(df)
+            with monitor.track('split_data', rows_in=len(df)) as m:
+                train_data, test_data = split_data(df, params)
+                m.rows_out = len(train_data) + len(test_data)
+            with monitor.track('save_data', rows_in=m.rows_out) as m:
+                save_data(train_data=train_data, test_data=test_data, data_path='./data', data_format=data_format)
+                m.wrote(train_path)
+                m.wrote(test_path)
+                m.rows_out = m.rows_in
+        monitor.publish()
         logger.debug('Data ingestion completed.')
     except Exception as e:
-        logger.error('Failed to complete data ingestion process.')
+        logger.error('Failed to complete data ingestion process: %s', e)
+        # a non-zero exit, so dvc stops instead of running on stale artifacts
+        raise
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
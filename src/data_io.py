@@ -0,0 +1,127 @@
+import pandas as pd
+import os
+
+# file extension used for every supported hand-off format
+FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+}
+
+
+def artifact_path(directory: str, name: str, data_format: str) -> str:
+    """Build the path of an intermediate artifact, e.g. ./data/raw/train.parquet"""
+    if data_format not in FORMATS:
+        raise ValueError(f'Unsupported data format "{data_format}", expected one of {list(FORMATS)}')
+    return os.path.join(directory, name + FORMATS[data_format])
+
+
+def format_of(path: str) -> str:
+    """Infer the data format from the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    for data_format, format_extension in FORMATS.items():
+        if extension == format_extension:
+            return data_format
+    raise ValueError(f'Cannot infer data format of "{path}"')
+
+
+def read_frame(path: str, columns: list = None, dtype: dict = None) -> pd.DataFrame:
+    """
+    Read a CSV or Parquet artifact. Parquet files are memory-mapped and keep
+    their dtypes, so no text parsing happens between stages; `dtype` only
+    applies to CSV parsing.
+    """
+    if format_of(path) == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas()
+    return pd.read_csv(path, usecols=columns, dtype=dtype)
+
+
+def read_csv_typed(path: str, columns: list, column_types: dict) -> pd.DataFrame:
+    """
+    Parse only `columns` of a CSV file with pyarrow's reader, straight into the
+    given Arrow types (dictionary types become pandas categories).
+    """
+    import pyarrow.csv as pv
+    convert_options = pv.ConvertOptions(include_columns=columns, column_types=column_types,
+                                        strings_can_be_null=True)
+    return pv.read_csv(path, convert_options=convert_options).to_pandas()
+
+
+def write_frame(df: pd.DataFrame, path: str) -> None:
+    """Write a DataFrame as CSV or Parquet depending on the file extension."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if format_of(path) == 'parquet':
+        df.to_parquet(path, index=False, engine='pyarrow')
+    else:
+        df.to_csv(path, index=False)
+
+
+def iter_frames(path: str, chunk_size: int, columns: list = None, dtype: dict = None):
+    """Yield the artifact in DataFrames of at most chunk_size rows (`dtype` as in read_frame)."""
+    if format_of(path) == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=dtype)
+
+
+class FrameWriter:
+    """
+    Appends DataFrames to a CSV or Parquet file chunk by chunk.
+    Parquet chunks are written as row groups that share the schema of the first chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data_format = format_of(path)
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self) -> 'FrameWriter':
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.data_format == 'csv':
+            self._file = open(self.path, 'w', newline='')
+        return self
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append one chunk to the file."""
+        if self.data_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                # an all-missing object column has no type yet, later chunks carry strings
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ], metadata=table.schema.metadata)
+                table = table.cast(schema)
+                self._writer = pq.ParquetWriter(self.path, schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self._file, header=(self.rows_written == 0), index=False)
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self.data_format == 'parquet' and self.rows_written == 0:
+            # nothing was written, still leave an (empty) file behind
+            pd.DataFrame().to_parquet(self.path, index=False, engine='pyarrow')
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
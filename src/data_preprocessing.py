@@ -1,36 +1,44 @@
 import pandas as pd
 import numpy as np
-import logging
 import os
+import json
+import pickle
+import yaml
+from data_io import artifact_path, read_frame, write_frame
+from incremental import clear_state, update_artifact
+from model_files import file_sha256
+from instrumentation import StageMonitor
+from preprocessor import Preprocessor
+from schema import RAW_SCHEMA, csv_dtypes, enforce_schema
+from sketches import profile_frame, quality_report
+from log_config import configure_logging, get_logger
 
-# ensure "log" folder exist
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('data_preprocessing')
 
-# setting logger for both console and file logger
-logger = logging.getLogger('data_preprocessing')
-logger.setLevel(logging.DEBUG)
+PREPROCESSOR_PATH = './models/preprocessor.pkl'
 
-# for console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
 
-# for file logger
-log_file_path = os.path.join(log_dir, 'data_preprocessing.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-# setting formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-# adding handler
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# method to load params from params.yaml
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
 
 
-def preprocess_df(dataFrame: pd.DataFrame) -> pd.DataFrame:
+def preprocess_df(dataFrame: pd.DataFrame, preprocessor: Preprocessor = None) -> pd.DataFrame:
     """
     This will preprocess data by:
     Age: Filling with median value
@@ -38,19 +46,13 @@ def preprocess_df(dataFrame: pd.DataFrame) -> pd.DataFrame:
     Encoding catagorical column:
     Sex: male: 0, female: 1
     Embarked: one-hot encoding (drop first to avoid multicollinearity)
+    The values come from `preprocessor`; without one they are learned from dataFrame itself.
     """
     try:
         logger.debug('Starting preprocessing of the DataFrame')
-        # Age: filling with median values
-        dataFrame['Age'].fillna(dataFrame['Age'].median(), inplace=True)
-        # Embarked: fill with most common value (mode)
-        dataFrame['Embarked'].fillna(dataFrame['Embarked'].mode()[0], inplace=True)
-        
-        # Sex: Encoding catagorical data
-        dataFrame['Sex'] = dataFrame['Sex'].map({'male': 0, 'female': 1})
-        # Embarked: one-hot encoding (drop first to avoid multicollinearity)
-        dataFrame = pd.get_dummies(dataFrame, columns=['Embarked'], drop_first=True)
-        
+        if preprocessor is None:
+            preprocessor = Preprocessor().fit(dataFrame)
+        dataFrame = preprocessor.transform(dataFrame)
         logger.debug('Data preprocessing successfully completed.')
         return dataFrame
     
@@ -59,38 +61,153 @@ def preprocess_df(dataFrame: pd.DataFrame) -> pd.DataFrame:
         raise
         
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, data_format: str = 'csv') -> None:
     """
     Saves both preprocessed train and test data into new file.
     """
     try:
         interim_data_path = os.path.join(data_path, 'interim')
         os.makedirs(interim_data_path, exist_ok=True)
-        train_data.to_csv(os.path.join(interim_data_path, 'train_processed.csv'), index=False)
-        test_data.to_csv(os.path.join(interim_data_path, 'test_processed.csv'), index=False)
+        for name, df in (('train_processed', train_data), ('test_processed', test_data)):
+            file_path = artifact_path(interim_data_path, name, data_format)
+            write_frame(df, file_path)
+            # rewritten in full, so a later incremental run starts over
+            clear_state(file_path)
         logger.debug('Preprocessed data saves successfully to %s', interim_data_path)
     except Exception as e:
         logger.error('Error during saving preprocessed data: %s', e)
         raise
+
+
+def refresh_data(train_data: pd.DataFrame, test_data: pd.DataFrame, preprocessor: Preprocessor,
+                 data_path: str, data_format: str = 'csv', block_size: int = 50000) -> int:
+    """
+    Incremental save: only the row blocks that are new or changed since the last run
+    (by content hash) are preprocessed and appended, see incremental.update_artifact().
+    Returns the number of rows preprocessed.
+    """
+    try:
+        interim_data_path = os.path.join(data_path, 'interim')
+        os.makedirs(interim_data_path, exist_ok=True)
+        fitted_on = file_sha256(PREPROCESSOR_PATH)
+        rows = 0
+        for name, df in (('train_processed', train_data), ('test_processed', test_data)):
+            file_path = artifact_path(interim_data_path, name, data_format)
+            n_blocks, n_rows = update_artifact(df, file_path, lambda block: preprocess_df(block, preprocessor),
+                                               block_size, fitted_on)
+            logger.debug('%s: %d new or changed blocks (%d rows) preprocessed', file_path, n_blocks, n_rows)
+            rows += n_rows
+        return rows
+    except Exception as e:
+        logger.error('Error during incremental refresh of preprocessed data: %s', e)
+        raise
+
+
+def save_quality_report(report: dict, file_path: str) -> None:
+    """
+    Saves the per-column null rates, quantiles/histograms and top values of both splits.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug('Data quality report saved to: %s', file_path)
+    except Exception as e:
+        logger.error('Error during saving data quality report: %s', e)
+        raise
+
+
+def save_preprocessor(preprocessor: Preprocessor, file_path: str) -> None:
+    """
+    Saves the fitted preprocessor next to the model, so scoring uses the train values.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            pickle.dump(preprocessor, file)
+        logger.debug('Preprocessor saved to: %s', file_path)
+    except Exception as e:
+        logger.error('Error during saving preprocessor: %s', e)
+        raise
+
+
+def load_preprocessor(file_path: str) -> Preprocessor:
+    """
+    Loads the preprocessor of an earlier run, an incremental refresh keeps its values.
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            preprocessor = pickle.load(file)
+        logger.debug('Preprocessor loaded from: %s', file_path)
+        return preprocessor
+    except Exception as e:
+        logger.error('Error during loading preprocessor: %s', e)
+        raise
     
 def main():
     """
     Main function to load raw data and preprocess it and save the preprocess data
     """
+    configure_logging('data_preprocessing')
     try:
+        monitor = StageMonitor('data_preprocessing')
+        all_params = load_params('params.yaml')
+        data_format = all_params['data_format']
+        sketch_params = all_params['data_preprocessing']['sketch']
+        refresh = all_params['refresh']
+        
         # loading raw data
-        train_data = pd.read_csv('./data/raw/train.csv')
-        test_data = pd.read_csv('./data/raw/test.csv')
+        with monitor.track('load_data') as m:
+            train_path = artifact_path('./data/raw', 'train', data_format)
+            test_path = artifact_path('./data/raw', 'test', data_format)
+            train_data = enforce_schema(read_frame(train_path, dtype=csv_dtypes(RAW_SCHEMA)), RAW_SCHEMA)
+            test_data = enforce_schema(read_frame(test_path, dtype=csv_dtypes(RAW_SCHEMA)), RAW_SCHEMA)
+            m.read(train_path)
+            m.read(test_path)
+            m.rows_out = len(train_data) + len(test_data)
         
-        # preprocessing data
-        train_preprocessed_data = preprocess_df(train_data)
-        test_preprocessed_data = preprocess_df(test_data)
+        # one pass of column sketches per split: imputation values (train only) and data quality
+        with monitor.track('profile_data', rows_in=len(train_data) + len(test_data)):
+            train_profile = profile_frame(train_data, **sketch_params)
+            test_profile = profile_frame(test_data, **sketch_params)
+            save_quality_report({'train': quality_report(train_profile), 'test': quality_report(test_profile)},
+                                './reports/data_quality.json')
         
-        # saving the preprocessed data
-        save_data(train_preprocessed_data, test_preprocessed_data, './data')
+        # learning the preprocessing values on train only, an incremental refresh keeps the saved ones
+        with monitor.track('fit_preprocessor', rows_in=len(train_data)) as m:
+            if refresh['incremental'] and os.path.exists(PREPROCESSOR_PATH):
+                preprocessor = load_preprocessor(PREPROCESSOR_PATH)
+            else:
+                preprocessor = Preprocessor().fit_profile(train_profile)
+                save_preprocessor(preprocessor, PREPROCESSOR_PATH)
+                m.wrote(PREPROCESSOR_PATH)
+        
+        if refresh['incremental']:
+            # preprocessing and saving only the blocks appended or changed since the last run
+            with monitor.track('refresh_data', rows_in=len(train_data) + len(test_data)) as m:
+                m.rows_out = refresh_data(train_data, test_data, preprocessor, './data', data_format,
+                                          refresh['block_size'])
+                m.wrote(artifact_path('./data/interim', 'train_processed', data_format))
+                m.wrote(artifact_path('./data/interim', 'test_processed', data_format))
+        else:
+            # preprocessing data
+            with monitor.track('preprocess_df', rows_in=len(train_data) + len(test_data)) as m:
+                train_preprocessed_data = preprocess_df(train_data, preprocessor)
+                test_preprocessed_data = preprocess_df(test_data, preprocessor)
+                m.rows_out = len(train_preprocessed_data) + len(test_preprocessed_data)
+            
+            # saving the preprocessed data
+            with monitor.track('save_data', rows_in=m.rows_out) as m:
+                save_data(train_preprocessed_data, test_preprocessed_data, './data', data_format)
+                m.wrote(artifact_path('./data/interim', 'train_processed', data_format))
+                m.wrote(artifact_path('./data/interim', 'test_processed', data_format))
+                m.rows_out = m.rows_in
+        monitor.publish()
         logger.debug('Preprocess operation completed successfully')
     except Exception as e:
         logger.error('Preprocessing operation failed: %s', e)
+        # a non-zero exit, so dvc stops instead of running on stale artifacts
+        raise
 
 
 if __name__ == '__main__':
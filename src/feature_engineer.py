@@ -0,0 +1,114 @@
+import pandas as pd
+import numpy as np
+
+from schema import PROCESSED_DTYPES, enforce_schema
+
+# raw honorifics -> title group; anything else is 'Rare'
+TITLE_GROUPS = {'Mr': 'Mr', 'Mrs': 'Mrs', 'Mme': 'Mrs', 'Miss': 'Miss', 'Mlle': 'Miss', 'Ms': 'Miss',
+                'Master': 'Master'}
+TITLES = ['Master', 'Miss', 'Mr', 'Mrs', 'Rare']
+# deck letters in bow-to-stern order, 0 is kept for "no cabin"
+DECKS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'T']
+
+# raw passenger fields each engineered feature is built from
+SOURCE_FIELDS = {
+    'FamilySize': ['SibSp', 'Parch'],
+    'IsAlone': ['SibSp', 'Parch'],
+    'Deck': ['Cabin'],
+    'CabinCount': ['Cabin'],
+    'TicketGroupSize': ['Ticket'],
+}
+SOURCE_FIELDS.update({f'Title_{title}': ['Name'] for title in TITLES[1:]})
+
+
+def map_unique(values: pd.Series, parse, missing) -> np.ndarray:
+    """
+    Apply parse() to the distinct values of a column only and broadcast the
+    results back by code, so a string shared by many rows is parsed once.
+    parse() receives the uniques as a Series; missing values get `missing`.
+    Categorical columns already hold the distinct values and the codes.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    parsed = np.asarray(parse(pd.Series(uniques, dtype=object)))
+    # code -1 (missing) picks the appended last element
+    return np.append(parsed, missing)[codes]
+
+
+def parse_titles(names: pd.Series) -> np.ndarray:
+    """Title group index (into TITLES) of 'Surname, Title. Given' names."""
+    titles = names.str.extract(r',\s*([^.]+)\.', expand=False).str.strip()
+    groups = titles.map(TITLE_GROUPS).fillna('Rare')
+    return pd.Index(TITLES).get_indexer(groups)
+
+
+def parse_decks(cabins: pd.Series) -> np.ndarray:
+    """Deck number (1 = A ... 8 = T, 0 = unknown) from the first cabin letter."""
+    return pd.Index(DECKS).get_indexer(cabins.str[0]) + 1
+
+
+def parse_cabin_counts(cabins: pd.Series) -> np.ndarray:
+    """Number of space separated cabins booked on one ticket."""
+    return cabins.str.split().str.len().fillna(0).to_numpy(dtype=np.int64)
+
+
+class FeatureEngineer:
+    """
+    Derives model features from the raw text and count columns:
+    Title_<group>: one-hot of the title in Name (first group dropped)
+    FamilySize: SibSp + Parch + 1, IsAlone: FamilySize == 1
+    Deck: deck of the first cabin (0 unknown), CabinCount: cabins on the booking
+    TicketGroupSize: passengers on the same ticket in the training data (1 if unseen)
+    Every string column is parsed per distinct value (see map_unique), not per row,
+    and dropped once parsed. The ticket counts are learned in fit() so scoring uses
+    the training groups.
+    """
+
+    def __init__(self):
+        self.ticket_counts = None
+
+    def fit(self, dataFrame: pd.DataFrame) -> 'FeatureEngineer':
+        """Learn the shared ticket groups from a (training) frame."""
+        counts = dataFrame['Ticket'].value_counts()
+        # unseen tickets count as 1, so only shared tickets need to be kept
+        self.ticket_counts = {str(ticket): int(count) for ticket, count in counts[counts > 1].items()}
+        return self
+
+    @property
+    def title_columns(self) -> list:
+        """One-hot column names produced for Title."""
+        return [f'Title_{title}' for title in TITLES[1:]]
+
+    def transform(self, dataFrame: pd.DataFrame) -> pd.DataFrame:
+        """Add the engineered columns to the frame in place of the parsed text columns."""
+        if self.ticket_counts is None:
+            raise ValueError('FeatureEngineer must be fitted before transform')
+        df = dataFrame.drop(columns=['Name', 'Ticket', 'Cabin'])
+
+        # Title: one-hot of the title group, rows without a parsable name are 'Rare'
+        title_codes = map_unique(dataFrame['Name'], parse_titles, TITLES.index('Rare'))
+        for code, column in enumerate(self.title_columns, start=1):
+            df[column] = title_codes == code
+
+        # family size from the sibling/spouse and parent/child counts
+        family_size = dataFrame['SibSp'].to_numpy(dtype=np.int64) + dataFrame['Parch'].to_numpy(dtype=np.int64) + 1
+        df['FamilySize'] = family_size
+        df['IsAlone'] = family_size == 1
+
+        # cabin deck and number of cabins, missing cabin -> 0
+        df['Deck'] = map_unique(dataFrame['Cabin'], parse_decks, 0)
+        df['CabinCount'] = map_unique(dataFrame['Cabin'], parse_cabin_counts, 0)
+
+        # ticket group size learned on train
+        ticket_counts = pd.Series(self.ticket_counts, dtype=np.int64)
+        df['TicketGroupSize'] = map_unique(
+            dataFrame['Ticket'],
+            lambda tickets: ticket_counts.reindex(tickets.astype(str)).fillna(1).to_numpy(dtype=np.int64),
+            1)
+
+        # compact dtypes of the schema; a value out of their range raises SchemaError instead of wrapping
+        counts = ['FamilySize', 'Deck', 'CabinCount', 'TicketGroupSize']
+        df[counts] = enforce_schema(df, {column: PROCESSED_DTYPES[column] for column in counts})
+        return df
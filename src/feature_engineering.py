@@ -1,82 +1,178 @@
 import pandas as pd
-import logging
 import os
+import pickle
+import yaml
+from data_io import artifact_path, read_frame, write_frame
+from feature_engineer import FeatureEngineer
+from incremental import clear_state, update_artifact
+from model_files import file_sha256
+from instrumentation import StageMonitor
+from schema import enforce_schema, processed_schema
+from log_config import configure_logging, get_logger
 
-# Ensuring "log" exists
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('feature_engieering')
 
-# setting logger for both console console and file
-logger = logging.getLogger('feature_engieering')
-logger.setLevel(logging.DEBUG)
+ENGINEER_PATH = './models/feature_engineer.pkl'
 
-# setting condole handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
 
-# setting file handler
-log_file_path = os.path.join(log_dir, 'feature_engineering.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-# setting formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-# adding handler to logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# method to load params from params.yaml
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
 
 
 def load_data(data_url: str) -> pd.DataFrame:
     """
-    Load train and test data from ./data/interim
+    Load train and test data from ./data/interim in the compact schema dtypes
     """
     try:
-        df = pd.read_csv(data_url)
+        df = read_frame(data_url)
+        df = enforce_schema(df, processed_schema(df.columns))
         logger.debug('Data Loaded Successfully from %s', data_url)
         return df
     except Exception as e:
         logger.error('Error occured during data loading: %s', e)
         raise
 
-def engineer_df(train_df: pd.DataFrame, test_df: pd.DataFrame) -> tuple:
-    """Engineering preprocessed data"""
+def engineer_df(dataFrame: pd.DataFrame, engineer: FeatureEngineer = None) -> pd.DataFrame:
+    """
+    Engineering preprocessed data: title, family size, cabin deck/count and ticket group size.
+    The ticket groups come from `engineer`; without one they are learned from dataFrame itself.
+    """
     try:
-        # nothing much to feature engineer, so pass it on as it is.
+        if engineer is None:
+            engineer = FeatureEngineer().fit(dataFrame)
+        dataFrame = engineer.transform(dataFrame)
         logger.debug('Preprocessed data have been engineered.')
-        return train_df, test_df
+        return dataFrame
     except Exception as e:
         logger.error('Error occured during engineering preprocessed data: %s', e)
         raise
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
-    """Savig egineered data as a csv file."""
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, data_format: str = 'csv') -> None:
+    """Savig egineered data in the configured data format."""
     try:
         engineer_data_path = os.path.join(data_path, 'engineered')
         os.makedirs(engineer_data_path, exist_ok=True)
-        train_data.to_csv(os.path.join(engineer_data_path, 'train_engineered.csv'), index=False)
-        test_data.to_csv(os.path.join(engineer_data_path, 'test_engineered.csv'), index=False)
+        for name, df in (('train_engineered', train_data), ('test_engineered', test_data)):
+            file_path = artifact_path(engineer_data_path, name, data_format)
+            write_frame(df, file_path)
+            # rewritten in full, so a later incremental run starts over
+            clear_state(file_path)
         logger.debug('Engineered data file save to %s', engineer_data_path)
     except Exception as e:
         logger.error('Error occured during saving data %s', e)
         raise
 
+def refresh_data(train_data: pd.DataFrame, test_data: pd.DataFrame, engineer: FeatureEngineer,
+                 data_path: str, data_format: str = 'csv', block_size: int = 50000) -> int:
+    """
+    Incremental save: engineering and appending only the row blocks that are new or changed
+    since the last run (by content hash). Returns the number of rows engineered.
+    """
+    try:
+        engineer_data_path = os.path.join(data_path, 'engineered')
+        os.makedirs(engineer_data_path, exist_ok=True)
+        fitted_on = file_sha256(ENGINEER_PATH)
+        rows = 0
+        for name, df in (('train_engineered', train_data), ('test_engineered', test_data)):
+            file_path = artifact_path(engineer_data_path, name, data_format)
+            n_blocks, n_rows = update_artifact(df, file_path, lambda block: engineer_df(block, engineer),
+                                               block_size, fitted_on)
+            logger.debug('%s: %d new or changed blocks (%d rows) engineered', file_path, n_blocks, n_rows)
+            rows += n_rows
+        return rows
+    except Exception as e:
+        logger.error('Error occured during incremental refresh of engineered data: %s', e)
+        raise
+
+def save_engineer(engineer: FeatureEngineer, file_path: str) -> None:
+    """Saving the fitted feature engineer next to the model, so scoring uses the train ticket groups."""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            pickle.dump(engineer, file)
+        logger.debug('Feature engineer saved to: %s', file_path)
+    except Exception as e:
+        logger.error('Error occured during saving feature engineer: %s', e)
+        raise
+
+def load_engineer(file_path: str) -> FeatureEngineer:
+    """Loading the feature engineer of an earlier run, an incremental refresh keeps its ticket groups."""
+    try:
+        with open(file_path, 'rb') as file:
+            engineer = pickle.load(file)
+        logger.debug('Feature engineer loaded from: %s', file_path)
+        return engineer
+    except Exception as e:
+        logger.error('Error occured during loading feature engineer: %s', e)
+        raise
+
 def main():
     """
     Docstring for main
     """
+    configure_logging('feature_engineering')
     try:
+        monitor = StageMonitor('feature_engineering')
+        all_params = load_params('params.yaml')
+        data_format = all_params['data_format']
+        refresh = all_params['refresh']
+        
         # loading data
-        train_data = load_data('./data/interim/train_processed.csv')
-        test_data = load_data('./data/interim/test_processed.csv')
+        with monitor.track('load_data') as m:
+            train_path = artifact_path('./data/interim', 'train_processed', data_format)
+            test_path = artifact_path('./data/interim', 'test_processed', data_format)
+            train_data = load_data(train_path)
+            test_data = load_data(test_path)
+            m.read(train_path)
+            m.read(test_path)
+            m.rows_out = len(train_data) + len(test_data)
         
-        # featuring engineering preprocessed data
-        train_engr_data, test_engr_data = engineer_df(train_data, test_data)
+        # learning the ticket groups on train only, an incremental refresh keeps the saved ones
+        with monitor.track('fit_engineer', rows_in=len(train_data)) as m:
+            if refresh['incremental'] and os.path.exists(ENGINEER_PATH):
+                engineer = load_engineer(ENGINEER_PATH)
+            else:
+                engineer = FeatureEngineer().fit(train_data)
+                save_engineer(engineer, ENGINEER_PATH)
+                m.wrote(ENGINEER_PATH)
         
-        # saving engineered data
-        save_data(train_engr_data, test_engr_data, './data')
+        if refresh['incremental']:
+            # engineering and saving only the blocks appended or changed since the last run
+            with monitor.track('refresh_data', rows_in=len(train_data) + len(test_data)) as m:
+                m.rows_out = refresh_data(train_data, test_data, engineer, './data', data_format,
+                                          refresh['block_size'])
+                m.wrote(artifact_path('./data/engineered', 'train_engineered', data_format))
+                m.wrote(artifact_path('./data/engineered', 'test_engineered', data_format))
+        else:
+            # featuring engineering preprocessed data
+            with monitor.track('engineer_df', rows_in=len(train_data) + len(test_data)) as m:
+                train_engr_data = engineer_df(train_data, engineer)
+                test_engr_data = engineer_df(test_data, engineer)
+                m.rows_out = len(train_engr_data) + len(test_engr_data)
+            
+            # saving engineered data
+            with monitor.track('save_data', rows_in=m.rows_out) as m:
+                save_data(train_engr_data, test_engr_data, './data', data_format)
+                m.wrote(artifact_path('./data/engineered', 'train_engineered', data_format))
+                m.wrote(artifact_path('./data/engineered', 'test_engineered', data_format))
+                m.rows_out = m.rows_in
+        monitor.publish()
         logger.debug('Full feature engineering operation completed.')
     except Exception as e:
         logger.error('Failed to complete feature engineering operation.')
@@ -0,0 +1,157 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+import tempfile
+
+from data_io import format_of, write_frame
+from schema import drop_unused_categories
+
+STATE_VERSION = 1
+
+
+def state_path_of(artifact_path: str) -> str:
+    """Block state kept next to an artifact, e.g. data/interim/train_processed.parquet.blocks.json"""
+    return artifact_path + '.blocks.json'
+
+
+def block_digests(df: pd.DataFrame, block_size: int) -> list:
+    """
+    Content hash of every block of block_size rows. Rows are hashed in one vectorized
+    call (values only, not the index); a block's digest is the SHA-256 of its row hashes.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    columns = hashlib.sha256('\x1f'.join(map(str, df.columns)).encode()).digest()
+    return [hashlib.sha256(columns + row_hashes[start:start + block_size].tobytes()).hexdigest()
+            for start in range(0, len(df), block_size)]
+
+
+def load_state(artifact_path: str) -> dict:
+    """Block state of an artifact, None if there is none or it is unreadable."""
+    try:
+        with open(state_path_of(artifact_path), 'r') as file:
+            state = json.load(file)
+        return state if state.get('version') == STATE_VERSION else None
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_state(artifact_path: str, state: dict) -> None:
+    """Write the block state atomically."""
+    directory = os.path.dirname(artifact_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(state, file, indent=4)
+    os.replace(tmp_path, state_path_of(artifact_path))
+
+
+def clear_state(artifact_path: str) -> None:
+    """Forget the blocks of an artifact that was rewritten in full."""
+    if os.path.exists(state_path_of(artifact_path)):
+        os.remove(state_path_of(artifact_path))
+
+
+def reusable_blocks(state: dict, digests: list, block_size: int, fitted_on: str, artifact_path: str) -> int:
+    """Number of leading blocks whose input and fitted step are unchanged since the last run."""
+    if state is None or not os.path.exists(artifact_path) \
+            or state['block_size'] != block_size or state['fitted_on'] != fitted_on:
+        return 0
+    reusable = 0
+    for old, new in zip(state['blocks'], digests):
+        if old['digest'] != new:
+            break
+        reusable += 1
+    return reusable
+
+
+def _append_csv(artifact_path: str, blocks, keep_state: list) -> list:
+    """Cut the CSV after the kept blocks and append the new ones; returns their state entries."""
+    offset = keep_state[-1]['end_offset'] if keep_state else 0
+    entries = []
+    with open(artifact_path, 'r+' if keep_state else 'w', newline='') as file:
+        file.seek(offset)
+        file.truncate()
+        for digest, output in blocks:
+            output.to_csv(file, header=(file.tell() == 0), index=False)
+            entries.append({'digest': digest, 'rows': len(output), 'end_offset': file.tell()})
+    return entries
+
+
+def _rewrite_parquet(artifact_path: str, blocks, n_keep: int) -> list:
+    """
+    Parquet files cannot be appended to: copy the kept row groups (one per block,
+    no re-processing) and the new blocks into a new file. Returns the new state entries.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    directory = os.path.dirname(artifact_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    os.close(fd)
+    entries = []
+    writer = None
+    try:
+        if n_keep:
+            old_file = pq.ParquetFile(artifact_path)
+            writer = pq.ParquetWriter(tmp_path, old_file.schema_arrow)
+            for i in range(n_keep):
+                writer.write_table(old_file.read_row_group(i))
+        for digest, output in blocks:
+            if writer is None:
+                table = pa.Table.from_pandas(output, preserve_index=False)
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            else:
+                table = pa.Table.from_pandas(output, schema=writer.schema, preserve_index=False)
+            writer.write_table(table, row_group_size=max(len(output), 1))
+            entries.append({'digest': digest, 'rows': len(output)})
+        if writer is not None:
+            writer.close()
+            writer = None
+        os.replace(tmp_path, artifact_path)
+        return entries
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def update_artifact(df: pd.DataFrame, artifact_path: str, transform, block_size: int, fitted_on: str) -> tuple:
+    """
+    Bring artifact_path up to date with transform(df), block by block.
+    Blocks up to the first new or changed one (by content hash, see block_digests)
+    are kept as they are; only the rest goes through transform(). Rows are expected
+    to be appended to df, so a refresh costs time in proportion to the new rows.
+    fitted_on fingerprints the fitted step; when it changes everything is redone.
+    An empty df gives an empty artifact that still has the transformed columns.
+    Returns (blocks transformed, rows transformed).
+    """
+    digests = block_digests(df, block_size)
+    state = load_state(artifact_path)
+    n_keep = reusable_blocks(state, digests, block_size, fitted_on, artifact_path)
+    if state is not None and n_keep == len(digests) and len(state['blocks']) == len(digests):
+        return 0, 0
+
+    if not digests:
+        # no blocks to append to or copy: written in full, header (or schema) only
+        write_frame(transform(df), artifact_path)
+        save_state(artifact_path, {'version': STATE_VERSION, 'block_size': block_size,
+                                   'fitted_on': fitted_on, 'blocks': []})
+        return 0, 0
+
+    # transformed lazily, one block in memory at a time
+    blocks = ((digests[i], transform(drop_unused_categories(df.iloc[i * block_size:(i + 1) * block_size])))
+              for i in range(n_keep, len(digests)))
+    kept_entries = state['blocks'][:n_keep] if n_keep else []
+    if format_of(artifact_path) == 'csv':
+        new_entries = _append_csv(artifact_path, blocks, kept_entries)
+    else:
+        new_entries = _rewrite_parquet(artifact_path, blocks, n_keep)
+
+    save_state(artifact_path, {
+        'version': STATE_VERSION,
+        'block_size': block_size,
+        'fitted_on': fitted_on,
+        'blocks': kept_entries + new_entries,
+    })
+    return len(new_entries), int(np.sum([entry['rows'] for entry in new_entries]))
@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# every stage publishes to dvclive/perf/<stage>, next to dvclive/metrics.json
+PERF_DIR = os.path.join('dvclive', 'perf')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if os.uname().sysname == 'Darwin' else peak / 2 ** 10
+
+
+def current_rss_mb():
+    """Resident set size of this process right now, in MB (None where /proc is not available)."""
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return None
+
+
+class RssSampler:
+    """
+    Peak RSS while a block runs. ru_maxrss is the peak of the whole process so far, so
+    it only counts when it rises during the block; otherwise a thread samples the RSS
+    every interval_s. rss_peak_mb is the peak above the RSS at the start of the block.
+    """
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        if rss is not None:
+            self.rss_peak = max(self.rss_peak, rss)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def __enter__(self) -> 'RssSampler':
+        self.rss_start = current_rss_mb()
+        self.rss_peak = self.rss_start or 0.0
+        self._max_rss_start = peak_rss_mb()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        max_rss = peak_rss_mb()
+        if max_rss is not None and max_rss > self._max_rss_start:
+            # the process reached a new maximum during the block, which is the exact peak
+            self.rss_peak = max(self.rss_peak, max_rss)
+
+    @property
+    def rss_peak_mb(self):
+        return self.rss_peak - self.rss_start if self.rss_start is not None else None
+
+
+def file_size(path: str) -> int:
+    """Size of a file in bytes, 0 if it does not exist."""
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class Measurement:
+    """Metrics of one tracked function; rows and bytes are filled in by the caller."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time_s = 0.0
+        self.cpu_time_s = 0.0
+        self.rss_peak_mb = None
+        self.rows_in = None
+        self.rows_out = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def read(self, path: str) -> None:
+        """Count the size of a file the function read."""
+        self.bytes_read += file_size(path)
+
+    def wrote(self, path: str) -> None:
+        """Count the size of a file the function wrote."""
+        self.bytes_written += file_size(path)
+
+    def as_dict(self) -> dict:
+        metrics = {
+            'wall_time_s': self.wall_time_s,
+            'cpu_time_s': self.cpu_time_s,
+            'rss_peak_mb': self.rss_peak_mb,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        if rows and self.wall_time_s > 0:
+            metrics['rows_per_sec'] = rows / self.wall_time_s
+        return {key: value for key, value in metrics.items() if value is not None}
+
+
+class StageMonitor:
+    """
+    Records wall time, CPU time, peak RSS, rows and bytes for a pipeline stage and
+    each major function in it, then publishes them as dvclive metrics and a plot.
+    rss_peak_mb is the peak RSS above the RSS at the start of the function (or stage):
+
+        monitor = StageMonitor('data_preprocessing')
+        with monitor.track('load_data') as m:
+            df = read_frame(path)
+            m.read(path)
+            m.rows_out = len(df)
+        monitor.publish()
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.measurements = []
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_rss = current_rss_mb()
+        self._rss_peak = self._start_rss or 0.0
+
+    @contextmanager
+    def track(self, name: str, rows_in: int = None):
+        measurement = Measurement(name)
+        measurement.rows_in = rows_in
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        memory = RssSampler()
+        try:
+            with memory:
+                yield measurement
+        finally:
+            measurement.wall_time_s = time.perf_counter() - start_wall
+            measurement.cpu_time_s = time.process_time() - start_cpu
+            measurement.rss_peak_mb = memory.rss_peak_mb
+            self._rss_peak = max(self._rss_peak, memory.rss_peak)
+            self.measurements.append(measurement)
+
+    def stage_measurement(self) -> Measurement:
+        """Totals for the whole stage: rows in of the first and rows out of the last function."""
+        total = Measurement('stage')
+        total.wall_time_s = time.perf_counter() - self._start_wall
+        total.cpu_time_s = time.process_time() - self._start_cpu
+        if self._start_rss is not None:
+            total.rss_peak_mb = self._rss_peak - self._start_rss
+        rows_in = [m.rows_in for m in self.measurements if m.rows_in is not None]
+        rows_out = [m.rows_out for m in self.measurements if m.rows_out is not None]
+        total.rows_in = rows_in[0] if rows_in else None
+        total.rows_out = rows_out[-1] if rows_out else None
+        total.bytes_read = sum(m.bytes_read for m in self.measurements)
+        total.bytes_written = sum(m.bytes_written for m in self.measurements)
+        return total
+
+    def publish(self, perf_dir: str = PERF_DIR) -> None:
+        """Log every measurement to dvclive/perf/<stage> (metrics.json + plots/custom/performance.json)."""
+        from dvclive import Live
+
+        measurements = self.measurements + [self.stage_measurement()]
+        with Live(dir=os.path.join(perf_dir, self.stage), save_dvc_exp=False, dvcyaml=None) as live:
+            for measurement in measurements:
+                for metric, value in measurement.as_dict().items():
+                    live.log_metric(f'{measurement.name}/{metric}', value, plot=False)
+            live.log_plot('performance',
+                          [dict(function=m.name, **m.as_dict()) for m in measurements],
+                          x='wall_time_s', y='function', template='bar_horizontal',
+                          title=f'{self.stage} wall time per function')
@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from prediction_cache import PredictionCache
+
+
+def linear_terms(model) -> tuple:
+    """
+    (weights, center, baseline) of a binary linear model, such that its logit is
+    baseline + sum(weights * (x - center)). For a StandardScaler + classifier pipeline
+    (incremental training) center is the scaler mean and weights are coef / scale, so a
+    contribution is coefficient x standardized value and the baseline is the intercept.
+    A bare model is centred on the training means model_building records as
+    feature_means_ (zero if there are none); its baseline is the logit of the mean passenger.
+    """
+    while isinstance(model, PredictionCache):
+        model = model.model
+    scaler = None
+    if isinstance(model, Pipeline):
+        if len(model.steps) != 2 or not isinstance(model.steps[0][1], StandardScaler):
+            raise ValueError('Explanations support a linear model with at most a StandardScaler in front')
+        scaler, model = model.steps[0][1], model.steps[1][1]
+    if not hasattr(model, 'coef_') or model.coef_.shape[0] != 1:
+        raise ValueError('Explanations need a fitted binary linear model (coef_ / intercept_)')
+    coef = model.coef_[0].astype(np.float64)
+    intercept = float(model.intercept_[0])
+    if scaler is not None:
+        return coef / scaler.scale_, scaler.mean_.astype(np.float64), intercept
+    center = np.asarray(getattr(model, 'feature_means_', np.zeros_like(coef)), dtype=np.float64)
+    return coef, center, intercept + float(coef @ center)
+
+
+def explain_chunk(model, X: pd.DataFrame, top_k: int = None) -> pd.DataFrame:
+    """
+    Per-row feature contributions to the logit of a whole chunk in one matrix operation.
+    Without top_k: a `baseline` column and one `contrib_<feature>` column per feature
+    (baseline + the contributions = the model's decision_function). With top_k: the
+    baseline and, per row, the top_k features with the largest absolute contribution
+    as `top<i>_feature` / `top<i>_contribution`, largest first.
+    """
+    weights, center, baseline = linear_terms(model)
+    features = list(X.columns)
+    contributions = (X.to_numpy(dtype=np.float64) - center) * weights
+    result = pd.DataFrame(index=X.index)
+    result['baseline'] = baseline
+    if top_k is None:
+        for i, feature in enumerate(features):
+            result[f'contrib_{feature}'] = contributions[:, i]
+        return result
+
+    top_k = min(top_k, len(features))
+    magnitude = np.abs(contributions)
+    rows = np.arange(len(magnitude))
+    # k argmax passes over the few feature columns, each one masks the column it took
+    for i in range(top_k):
+        top = magnitude.argmax(axis=1)
+        magnitude[rows, top] = -1.0
+        # feature names as categories: no per-row strings are built
+        result[f'top{i + 1}_feature'] = pd.Categorical.from_codes(top, categories=features)
+        result[f'top{i + 1}_contribution'] = contributions[rows, top]
+    return result
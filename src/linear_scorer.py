@@ -0,0 +1,156 @@
+import numpy as np
+import json
+import struct
+
+# file layout: MAGIC | version (uint32) | header length (uint32) | JSON header | padding | float64 weights
+MAGIC = b'TTNC'
+VERSION = 1
+_PREFIX = struct.Struct('<4sII')
+_ALIGNMENT = 8
+
+
+def write_linear_model(file_path: str, features: list, coef, intercept: float, preprocessing: dict,
+                       source_sha256: str = None) -> None:
+    """
+    Write feature order, preprocessing constants, intercept and coefficients to a
+    small binary file. The weights start on an 8 byte boundary so they can be memory-mapped.
+    source_sha256 is the hash of the model.pkl the weights come from.
+    """
+    weights = np.concatenate([[intercept], np.asarray(coef, dtype=np.float64).ravel()]).astype('<f8')
+    header = {'features': list(features), 'preprocessing': preprocessing, 'n_weights': int(weights.size)}
+    if source_sha256 is not None:
+        header['source_sha256'] = source_sha256
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = _PREFIX.size + len(header_bytes)
+    padding = (-data_offset) % _ALIGNMENT
+    with open(file_path, 'wb') as file:
+        file.write(_PREFIX.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        file.write(b'\0' * padding)
+        file.write(weights.tobytes())
+
+
+def _parse_title(name: str, constants: dict) -> int:
+    """Title group index of 'Surname, Title. Given' (same rules as feature_engineer.parse_titles)."""
+    _, comma, rest = name.partition(',')
+    title, dot, _ = rest.partition('.')
+    group = constants['title_groups'].get(title.strip(), 'Rare') if comma and dot else 'Rare'
+    return constants['titles'].index(group)
+
+
+def _parse_deck(cabin: str, constants: dict) -> int:
+    decks = constants['decks']
+    return decks.index(cabin[0]) + 1 if cabin and cabin[0] in decks else 0
+
+
+def _parse_cabin_count(cabin: str, constants: dict) -> int:
+    return len(cabin.split())
+
+
+def _parse_ticket(ticket: str, constants: dict) -> int:
+    return constants['ticket_counts'].get(ticket, 1)
+
+
+# str() of a missing value
+_MISSING = {'None', 'nan', ''}
+
+
+def _map_unique(values, parse, missing, constants: dict) -> np.ndarray:
+    """Parse every distinct string once and broadcast the results back to the rows."""
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    parsed = np.array([missing if value in _MISSING else parse(value, constants) for value in uniques],
+                      dtype=np.float64)
+    return parsed[inverse.ravel()]
+
+
+class LinearScorer:
+    """
+    Scores passengers with an exported linear model using NumPy only: no pandas,
+    no sklearn and no unpickling. Inputs are column arrays keyed by raw field name
+    (Pclass, Sex, Age, SibSp, Parch, Fare, Embarked, Name, Ticket, Cabin, ...).
+    """
+
+    def __init__(self, features: list, weights: np.ndarray, preprocessing: dict, source_sha256: str = None):
+        self.features = features
+        self.intercept = float(weights[0])
+        self.coef = weights[1:]
+        self.preprocessing = preprocessing
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def load(cls, file_path: str) -> 'LinearScorer':
+        """Read the header and memory-map the weights of a file written by write_linear_model()."""
+        with open(file_path, 'rb') as file:
+            magic, version, header_length = _PREFIX.unpack(file.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f'{file_path} is not an exported linear model')
+            if version != VERSION:
+                raise ValueError(f'Unsupported model file version {version}')
+            header = json.loads(file.read(header_length).decode('utf-8'))
+        data_offset = _PREFIX.size + header_length
+        data_offset += (-data_offset) % _ALIGNMENT
+        weights = np.memmap(file_path, dtype='<f8', mode='r', offset=data_offset, shape=(header['n_weights'],))
+        return cls(header['features'], weights, header['preprocessing'], header.get('source_sha256'))
+
+    def prepare(self, columns: dict) -> np.ndarray:
+        """Build the (rows, features) float matrix with the exported preprocessing constants."""
+        constants = self.preprocessing
+        n_rows = len(next(iter(columns.values())))
+        X = np.empty((n_rows, len(self.features)), dtype=np.float64)
+        embarked = None
+        title_codes = None
+        for j, feature in enumerate(self.features):
+            if feature == 'Age':
+                age = np.asarray(columns['Age'], dtype=np.float64)
+                X[:, j] = np.where(np.isnan(age), constants['age_median'], age)
+            elif feature == 'Sex':
+                sex = np.asarray(columns['Sex'], dtype=object)
+                X[:, j] = np.where(sex == 'female', 1.0, np.where(sex == 'male', 0.0, np.nan))
+            elif feature.startswith('Embarked_'):
+                if embarked is None:
+                    embarked = np.asarray(columns['Embarked'], dtype=object)
+                    known = np.zeros(n_rows, dtype=bool)
+                    for port in constants['embarked_categories']:
+                        known |= embarked == port
+                    embarked = np.where(known, embarked, constants['embarked_mode'])
+                X[:, j] = embarked == feature.split('_', 1)[1]
+            elif feature.startswith('Title_'):
+                if title_codes is None:
+                    title_codes = _map_unique(columns['Name'], _parse_title, constants['titles'].index('Rare'),
+                                              constants)
+                X[:, j] = title_codes == constants['titles'].index(feature.split('_', 1)[1])
+            elif feature in ('FamilySize', 'IsAlone'):
+                family_size = (np.asarray(columns['SibSp'], dtype=np.float64)
+                               + np.asarray(columns['Parch'], dtype=np.float64) + 1)
+                X[:, j] = family_size if feature == 'FamilySize' else family_size == 1
+            elif feature == 'Deck':
+                X[:, j] = _map_unique(columns['Cabin'], _parse_deck, 0, constants)
+            elif feature == 'CabinCount':
+                X[:, j] = _map_unique(columns['Cabin'], _parse_cabin_count, 0, constants)
+            elif feature == 'TicketGroupSize':
+                X[:, j] = _map_unique(columns['Ticket'], _parse_ticket, 1, constants)
+            else:
+                X[:, j] = np.asarray(columns[feature], dtype=np.float64)
+        return X
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """(rows, 2) class probabilities, same layout as sklearn."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return (self.decision_function(X) > 0).astype(np.int64)
+
+    def score(self, columns: dict, threshold: float = None) -> tuple:
+        """
+        Return (labels, survival probabilities) for raw passenger columns; with a
+        threshold a passenger survives if the probability is >= threshold.
+        """
+        X = self.prepare(columns)
+        z = self.decision_function(X)
+        proba = 1.0 / (1.0 + np.exp(-z))
+        labels = z > 0 if threshold is None else proba >= threshold
+        return labels.astype(np.int64), proba
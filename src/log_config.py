@@ -0,0 +1,178 @@
+import logging
+import logging.handlers
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
+
+import yaml
+
+# same layout the stage modules always used
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+DEFAULTS = {
+    'level': 'DEBUG',
+    'console': True,
+    'json': False,
+    'log_dir': 'logs',
+    # DEBUG records with the same logger and message template allowed per window
+    'rate_limit': {'max_records': 20, 'interval_s': 10.0},
+}
+
+_listener = None
+_lock = threading.Lock()
+# queue handler settings of this process, reused for the queue of worker processes
+_queue_settings = None
+_worker_queue = None
+_worker_listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger for a module. Nothing is configured here, so importing a module
+    creates no directory, file or handler; the entry point calls configure_logging().
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message (+ exception)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most max_records DEBUG records per (logger, message template) through
+    in each interval_s window, e.g. the per-chunk messages of a long scoring run.
+    The first record of the next window reports how many were dropped.
+    INFO and above always pass.
+    """
+
+    def __init__(self, max_records: int, interval_s: float):
+        super().__init__()
+        self.max_records = max_records
+        self.interval_s = interval_s
+        self._windows = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        start, count, dropped = self._windows.get(key, (now, 0, 0))
+        if now - start >= self.interval_s:
+            if dropped:
+                record.msg = f'{record.msg} ({dropped} similar messages suppressed)'
+            start, count, dropped = now, 0, 0
+        if count >= self.max_records:
+            self._windows[key] = (start, count, dropped + 1)
+            return False
+        self._windows[key] = (start, count + 1, dropped)
+        return True
+
+
+def _load_options(params_path: str) -> dict:
+    """DEFAULTS updated with the `logging` section of params.yaml, if there is one."""
+    options = dict(DEFAULTS)
+    if params_path and os.path.exists(params_path):
+        with open(params_path, 'r') as file:
+            options.update((yaml.safe_load(file) or {}).get('logging') or {})
+    return options
+
+
+def _route_to_queue(log_queue) -> None:
+    """Send the records of this process to log_queue: a QueueHandler on the root logger."""
+    level, rate_limit = _queue_settings
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter(rate_limit['max_records'], rate_limit['interval_s']))
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    # third party libraries stay at WARNING, module loggers (get_logger) are at DEBUG
+    root.setLevel(logging.WARNING)
+
+
+def configure_logging(log_name: str, params_path: str = 'params.yaml') -> logging.handlers.QueueListener:
+    """
+    Route every record through a queue to a background listener that writes the
+    console and logs/<log_name>.log, so a log call only formats and enqueues.
+    Called once by the entry point (later calls return the running listener).
+    Options come from the `logging` section of params.yaml (see DEFAULTS).
+    """
+    global _listener, _queue_settings
+    with _lock:
+        if _listener is not None:
+            return _listener
+        options = _load_options(params_path)
+        level = logging.getLevelName(str(options['level']).upper())
+        formatter = JsonFormatter() if options['json'] else logging.Formatter(TEXT_FORMAT)
+
+        handlers = []
+        if options['console']:
+            handlers.append(logging.StreamHandler())
+        os.makedirs(options['log_dir'], exist_ok=True)
+        handlers.append(logging.FileHandler(os.path.join(options['log_dir'], f'{log_name}.log')))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        _queue_settings = (level, options['rate_limit'])
+        log_queue = queue.SimpleQueue()
+        _route_to_queue(log_queue)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers)
+        _listener.start()
+        # flush whatever is still queued when the process exits
+        atexit.register(_listener.stop)
+        return _listener
+
+
+def worker_logging():
+    """
+    What a worker process needs to log through this process: a queue for its
+    records, written by a second listener to the same console and log file, and the
+    level and rate limit. None if logging is not configured. Pass it to
+    configure_worker_logging() in the worker initializer.
+    """
+    global _worker_queue, _worker_listener
+    with _lock:
+        if _listener is None:
+            return None
+        if _worker_queue is None:
+            _worker_queue = multiprocessing.Queue()
+            _worker_listener = logging.handlers.QueueListener(_worker_queue, *_listener.handlers)
+            _worker_listener.start()
+            atexit.register(_worker_listener.stop)
+        return _worker_queue, _queue_settings
+
+
+def configure_worker_logging(logging_target) -> None:
+    """
+    Worker process initializer: a forked worker inherits the parent's QueueHandler but
+    not its listener thread, so its records would be queued and never written. Route
+    them to the parent through logging_target (from worker_logging()) instead.
+    """
+    global _queue_settings
+    if logging_target is None:
+        return
+    log_queue, _queue_settings = logging_target
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _route_to_queue(log_queue)
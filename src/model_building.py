@@ -1,30 +1,36 @@
 import pandas as pd
-import logging
+import numpy as np
 import os
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
 import pickle
 import yaml
+import json
+import time
+import itertools
+import warnings
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import StratifiedKFold
+from data_io import artifact_path, iter_frames, read_frame
+from model_registry import publish_version
+from parallel import SharedArrays, fold_arrays, fold_indices, make_pool, worker_arrays
+from instrumentation import StageMonitor
+from schema import enforce_schema, processed_schema
+from log_config import configure_logging, get_logger
 
-# Ensure "logs" exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('model_building')
 
-logger = logging.getLogger('model_building')
-logger.setLevel(logging.DEBUG)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-
-log_file_path = os.path.join(log_dir, 'model_building.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# l1_ratio values each LogisticRegression solver supports (0 = l2, 1 = l1, None = any mix)
+SOLVER_L1_RATIOS = {
+    'lbfgs': [0.0],
+    'liblinear': [0.0, 1.0],
+    'newton-cg': [0.0],
+    'newton-cholesky': [0.0],
+    'sag': [0.0],
+    'saga': None,
+}
 
 
 # method to load params from params.yaml
@@ -47,10 +53,11 @@ def load_params(params_path: str) -> dict:
 
 
 # method to load data from a path
-def load_data(data_path: str) -> pd.DataFrame:
-    """Load CSV data from the given location."""
+def load_data(data_path: str, columns: list = None) -> pd.DataFrame:
+    """Load CSV/Parquet data (only `columns` if given) from the given location in the compact schema dtypes."""
     try:
-        df = pd.read_csv(data_path)
+        df = read_frame(data_path, columns=columns)
+        df = enforce_schema(df, processed_schema(df.columns))
         logger.debug('Data set loaded from %s', data_path)
         return df
     except pd.errors.ParserError as e:
@@ -60,6 +67,12 @@ def load_data(data_path: str) -> pd.DataFrame:
         logger.error('Unexpected error occured during data loading %s', e)
         raise
 
+# reference point of per-row explanations (see linear_explainer)
+def record_feature_means(model, X: pd.DataFrame):
+    """Keep the training mean of every feature on the fitted model as feature_means_"""
+    model.feature_means_ = X.mean().to_numpy(dtype=np.float64)
+    return model
+
 # method to train model from training dataset
 def train_model(train_df: pd.DataFrame, params: dict) -> LogisticRegression:
     """Model training: Logistic Regression"""
@@ -67,11 +80,11 @@ def train_model(train_df: pd.DataFrame, params: dict) -> LogisticRegression:
         # model building on training data
         logger.debug('Started training ML model.')
         max_iter = params['max_iter']
-        features = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked_Q', 'Embarked_S']
-        X_train = train_df[features]
+        X_train = train_df[params['features']]
         y_train = train_df['Survived']
         lr_model = LogisticRegression(max_iter=max_iter) # max_iter = 200
         lr_model.fit(X_train, y_train) # both features from train dataset.
+        record_feature_means(lr_model, X_train)
         logger.debug('Model training completed.')
         return lr_model
     except ValueError as e:
@@ -81,6 +94,222 @@ def train_model(train_df: pd.DataFrame, params: dict) -> LogisticRegression:
         logger.error('Error occured during model training: %s', e)
         raise
 
+# out-of-core training: one chunk in memory at a time
+def train_incremental(read_chunks, params: dict) -> tuple:
+    """
+    Train a logistic-loss SGD model chunk by chunk with partial_fit.
+    read_chunks() must return a fresh iterator of DataFrames holding params['features'] and
+    'Survived'. A first pass fits the feature scaler, then every epoch streams the
+    chunks again. The loss of each chunk is measured before the model updates on it
+    (progressive validation); training converges once an epoch improves the mean loss by
+    less than tol (but not below zero). An epoch whose loss rises counts against patience:
+    after that many rises in a row training stops unconverged (stop_reason in the report).
+    Returns (model, report) where model is a scaler + SGD Pipeline.
+    """
+    try:
+        inc_params = params['incremental']
+        features = params['features']
+        logger.debug('Started incremental training.')
+
+        scaler = StandardScaler()
+        for chunk in read_chunks():
+            scaler.partial_fit(chunk[features])
+
+        classifier = SGDClassifier(loss='log_loss', alpha=inc_params['alpha'],
+                                   random_state=inc_params['random_state'])
+        rng = np.random.default_rng(inc_params['random_state'])
+        classes = np.array([0, 1])
+        history = []
+        stop_reason = 'max_epochs'
+        rises = 0
+        fitted = False
+        for epoch in range(inc_params['epochs']):
+            loss_sum, n_scored, n_rows = 0.0, 0, 0
+            for chunk in read_chunks():
+                X = scaler.transform(chunk[features])
+                y = chunk['Survived'].to_numpy()
+                order = rng.permutation(len(y))
+                X, y = X[order], y[order]
+                if fitted:
+                    proba = np.clip(classifier.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+                    loss_sum -= float(np.sum(y * np.log(proba) + (1 - y) * np.log(1 - proba)))
+                    n_scored += len(y)
+                classifier.partial_fit(X, y, classes=classes)
+                fitted = True
+                n_rows += len(y)
+            epoch_loss = loss_sum / n_scored if n_scored else None
+            history.append({'epoch': epoch, 'rows': n_rows, 'log_loss': epoch_loss})
+            logger.debug('Epoch %d: %d rows, progressive log loss %s', epoch, n_rows, epoch_loss)
+            if len(history) > 1 and history[-2]['log_loss'] is not None:
+                improvement = history[-2]['log_loss'] - epoch_loss
+                if improvement < 0:
+                    rises += 1
+                    logger.debug('Epoch %d: progressive log loss rose by %.6f (%d of patience %d)',
+                                 epoch, -improvement, rises, inc_params['patience'])
+                    if rises >= inc_params['patience']:
+                        logger.warning('Progressive log loss rose %d epochs in a row, stopping unconverged', rises)
+                        stop_reason = 'loss_increased'
+                        break
+                    continue
+                rises = 0
+                if improvement < inc_params['tol']:
+                    stop_reason = 'converged'
+                    break
+
+        model = Pipeline([('scaler', scaler), ('classifier', classifier)])
+        converged = stop_reason == 'converged'
+        report = {'converged': converged, 'stop_reason': stop_reason, 'epochs_run': len(history), 'history': history}
+        logger.debug('Incremental training completed (converged: %s).', converged)
+        return model, report
+    except Exception as e:
+        logger.error('Error occured during incremental training: %s', e)
+        raise
+
+
+# saving a JSON report next to the other reports
+def save_report(report, file_path: str) -> None:
+    """Save a training report (search leaderboard, convergence history) into a JSON file"""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug('Training report saved to: %s', file_path)
+    except Exception as e:
+        logger.error('Error occured during saving the training report: %s', e)
+        raise
+
+
+# expanding the search space from params.yaml
+def search_candidates(search_params: dict) -> list:
+    """
+    All valid combinations of the param_grid (solver/l1_ratio pairs sklearn rejects are
+    skipped); random search keeps n_iter of them, drawn with the search random_state.
+    The regularization is set with l1_ratio and C (.inf for none), not the deprecated penalty.
+    """
+    grid = search_params['param_grid']
+    if 'penalty' in grid:
+        raise ValueError('param_grid: penalty is deprecated in sklearn, use l1_ratio (0 = l2, 1 = l1) and C')
+    names = list(grid)
+    candidates = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        candidate = dict(zip(names, values))
+        l1_ratios = SOLVER_L1_RATIOS.get(candidate.get('solver', 'lbfgs'), [])
+        if l1_ratios is not None and candidate.get('l1_ratio', 0.0) not in l1_ratios:
+            continue
+        candidates.append(candidate)
+    if search_params['method'] == 'random':
+        rng = np.random.default_rng(search_params['random_state'])
+        n_iter = min(search_params['n_iter'], len(candidates))
+        candidates = [candidates[i] for i in sorted(rng.choice(len(candidates), n_iter, replace=False))]
+    elif search_params['method'] != 'grid':
+        raise ValueError(f'Unknown search method: {search_params["method"]}')
+    return candidates
+
+
+def make_candidate(candidate: dict, max_iter: int) -> Pipeline:
+    """
+    A search candidate: LogisticRegression behind a StandardScaler, so saga and high C
+    converge on unscaled Age/Fare. Used for the CV fits and the refit alike.
+    """
+    return Pipeline([('scaler', StandardScaler()), ('classifier', LogisticRegression(max_iter=max_iter, **candidate))])
+
+
+def fit_converged(model, X, y) -> bool:
+    """
+    Fit model and tell whether it converged: ConvergenceWarnings are caught so the
+    search can report them per candidate, any other warning is shown as usual.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ConvergenceWarning)
+        model.fit(X, y)
+    converged = True
+    for warning in caught:
+        if issubclass(warning.category, ConvergenceWarning):
+            converged = False
+        else:
+            warnings.showwarning(warning.message, warning.category, warning.filename, warning.lineno)
+    return converged
+
+
+def _fit_candidate_fold(candidate_id: int, candidate: dict, max_iter: int, fold: int) -> tuple:
+    """Worker: fit one candidate on one fold of the shared training matrix."""
+    arrays = worker_arrays()
+    train_idx, valid_idx = fold_indices(arrays, fold)
+    X, y = arrays['X'], arrays['y']
+    start = time.perf_counter()
+    model = make_candidate(candidate, max_iter)
+    converged = fit_converged(model, X[train_idx], y[train_idx])
+    score = float((model.predict(X[valid_idx]) == y[valid_idx]).mean())
+    return candidate_id, score, time.perf_counter() - start, converged
+
+
+# searching hyperparameters on a process pool
+def search_model(train_df: pd.DataFrame, params: dict) -> tuple:
+    """
+    Cross-validated hyperparameter search for LogisticRegression on standardized features.
+    The training matrix and the fold indices (computed once) are shared with the
+    workers as memory-mapped .npy files. Folds are evaluated round by round and after
+    each round candidates whose mean accuracy is more than early_stopping_margin below
+    the best are dropped. The best candidate is refit on the full training data.
+    Returns (model, leaderboard); model is a scaler + LogisticRegression Pipeline.
+    """
+    try:
+        search_params = params['search']
+        candidates = search_candidates(search_params)
+        logger.debug('Searching %d candidates with %s search', len(candidates), search_params['method'])
+
+        X = train_df[params['features']].to_numpy(dtype=np.float64)
+        y = train_df['Survived'].to_numpy()
+        folds = list(StratifiedKFold(n_splits=search_params['cv_folds'], shuffle=True,
+                                     random_state=search_params['random_state']).split(X, y))
+        shared_data = {'X': X, 'y': y, **fold_arrays(folds)}
+
+        scores = {i: [] for i in range(len(candidates))}
+        fit_times = {i: 0.0 for i in range(len(candidates))}
+        not_converged = {i: 0 for i in range(len(candidates))}
+        alive = set(scores)
+        margin = search_params['early_stopping_margin']
+        with SharedArrays(shared_data) as shared, make_pool(shared, search_params['n_jobs']) as pool:
+            for fold in range(len(folds)):
+                futures = [pool.submit(_fit_candidate_fold, i, candidates[i], params['max_iter'], fold)
+                           for i in sorted(alive)]
+                for future in futures:
+                    candidate_id, score, fit_time, converged = future.result()
+                    scores[candidate_id].append(score)
+                    fit_times[candidate_id] += fit_time
+                    not_converged[candidate_id] += not converged
+                best_mean = max(np.mean(scores[i]) for i in alive)
+                # a single fold is too noisy to judge, start dropping from the second one
+                dropped = {i for i in alive if np.mean(scores[i]) < best_mean - margin} if fold else set()
+                alive -= dropped
+                logger.debug('Fold %d: best mean accuracy %.4f, dropped %d, %d left',
+                             fold, best_mean, len(dropped), len(alive))
+
+        leaderboard = sorted(({
+            'params': candidates[i],
+            'mean_accuracy': float(np.mean(scores[i])),
+            'std_accuracy': float(np.std(scores[i])),
+            'folds_evaluated': len(scores[i]),
+            'fit_time': fit_times[i],
+            'folds_not_converged': not_converged[i],
+            'status': 'complete' if i in alive else 'stopped early',
+        } for i in scores), key=lambda row: (row['status'] != 'complete', -row['mean_accuracy']))
+        for row in leaderboard:
+            if row['folds_not_converged']:
+                logger.warning('Candidate %s did not converge in %d of %d folds (max_iter %d)', row['params'],
+                               row['folds_not_converged'], row['folds_evaluated'], params['max_iter'])
+
+        best = leaderboard[0]['params']
+        model = make_candidate(best, params['max_iter'])
+        if not fit_converged(model, train_df[params['features']], train_df['Survived']):
+            logger.warning('Refit of the best candidate %s did not converge (max_iter %d)', best, params['max_iter'])
+        logger.debug('Best params %s (mean accuracy %.4f)', best, leaderboard[0]['mean_accuracy'])
+        return model, leaderboard
+    except Exception as e:
+        logger.error('Error occured during hyperparameter search: %s', e)
+        raise
+
+
 # method to save trained model to a .pkl file
 def save_model(model: LogisticRegression, file_path: str) -> None:
     """Save mode into a model folder"""
@@ -88,8 +317,11 @@ def save_model(model: LogisticRegression, file_path: str) -> None:
         # ensuring the directory exists
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
-        with open(file_path, 'wb') as file:
+        # written next to the target and renamed, so readers never load a half-written model
+        tmp_path = f'{file_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as file:
             pickle.dump(model, file)
+        os.replace(tmp_path, file_path)
         logger.debug('Model saved to: %s', file_path)
     except FileNotFoundError as e:
         logger.error('File path not found: %s', e)
@@ -99,21 +331,67 @@ def save_model(model: LogisticRegression, file_path: str) -> None:
         raise
 
 
+# publishing the saved model with its preprocessing steps as a new registry version
+def register_model(registry_params: dict, model_path: str, features: list) -> str:
+    """Add model_path, preprocessor and feature engineer to the model registry and make it the current version"""
+    try:
+        version = publish_version(registry_params['path'], {
+            'model': model_path,
+            'preprocessor': './models/preprocessor.pkl',
+            'engineer': './models/feature_engineer.pkl',
+        }, metadata={'features': features}, keep_versions=registry_params['keep_versions'])
+        logger.debug('Model registered as version %s', version)
+        return version
+    except Exception as e:
+        logger.error('Error occured during model registration: %s', e)
+        raise
+
+
 def main():
     """Load data engineered data, train model(LogisticReg) then saving model"""
+    configure_logging('model_building')
     try:
         
+        monitor = StageMonitor('model_building')
+        
         # loading params from params.yaml
-        params = load_params('params.yaml')['model_building']
+        all_params = load_params('params.yaml')
+        params = all_params['model_building']
         
-        # loading model
-        train_data = load_data('./data/engineered/train_engineered.csv')
+        train_path = artifact_path('./data/engineered', 'train_engineered', all_params['data_format'])
         
-        # train mode on train data
-        model = train_model(train_data, params=params)
+        # train mode on train data (streamed, searched or plain)
+        if params['incremental']['enabled']:
+            chunk_size = params['incremental']['chunk_size']
+            with monitor.track('train_incremental') as m:
+                model, report = train_incremental(
+                    lambda: iter_frames(train_path, chunk_size, columns=params['features'] + ['Survived']), params=params)
+                m.read(train_path)
+                m.rows_in = report['history'][0]['rows'] if report['history'] else 0
+            save_report(report, './reports/training_convergence.json')
+        else:
+            with monitor.track('load_data') as m:
+                train_data = load_data(train_path, columns=params['features'] + ['Survived'])
+                m.read(train_path)
+                m.rows_out = len(train_data)
+            if params['search']['enabled']:
+                with monitor.track('search_model', rows_in=len(train_data)):
+                    model, leaderboard = search_model(train_data, params=params)
+                save_report(leaderboard, './reports/search_leaderboard.json')
+            else:
+                with monitor.track('train_model', rows_in=len(train_data)):
+                    model = train_model(train_data, params=params)
         
         # saving train model
-        save_model(model, './models/model.pkl')
+        with monitor.track('save_model') as m:
+            save_model(model, './models/model.pkl')
+            m.wrote('./models/model.pkl')
+        
+        # versioned copy for long-running scorers (they hot reload it)
+        if all_params['model_registry']['enabled']:
+            with monitor.track('register_model'):
+                register_model(all_params['model_registry'], './models/model.pkl', params['features'])
+        monitor.publish()
         
         logger.debug('Model training operation completed.')
     except Exception as e:
@@ -1,39 +1,30 @@
 import pandas as pd
 import numpy as np
-import logging
 import os
 import json
 import yaml
 import pickle
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+import time
 from dvclive import Live 
+from sklearn.model_selection import StratifiedKFold
+from threadpoolctl import threadpool_limits
+from data_io import artifact_path, iter_frames, read_frame
+from model_files import file_sha256
+from model_registry import BUNDLE_FILES, current_version, publish_version, read_meta
+from instrumentation import StageMonitor
+from model_building import train_model
+from parallel import SharedArrays, fold_arrays, fold_indices, make_pool, worker_arrays
+from prediction_cache import PredictionCache, cached_model
+from schema import enforce_schema, processed_schema
+from log_config import configure_logging, get_logger
 
-# ensuring "logs" exists
-log_dir = "logs"
-os.makedirs(log_dir, exist_ok=True)
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('model_evaluation')
 
-
-# setting logger
-logger = logging.getLogger('model_evaluation')
-logger.setLevel(logging.DEBUG)
-
-# console logger
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-
-# file logger
-log_file_path = os.path.join(log_dir, 'model_evaluation.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-# setting formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-# adding handler
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# Survived is binary: rows of the confusion matrix are true labels, columns predictions
+LABELS = [0, 1]
+# scores summarized over the folds of cross-validation (see fold_scores)
+CV_METRICS = ['accuracy', 'precision', 'recall', 'f1', 'macro_f1']
 
 
 
@@ -73,10 +64,11 @@ def load_model(model_path: str):
 
 
 # load data from the data folder
-def load_data(file_path: str) -> pd.DataFrame:
-    """Load test data from the folder"""
+def load_data(file_path: str, columns: list = None) -> pd.DataFrame:
+    """Load test data (only `columns` if given) from the folder in the compact schema dtypes"""
     try:
-        df = pd.read_csv(file_path)
+        df = read_frame(file_path, columns=columns)
+        df = enforce_schema(df, processed_schema(df.columns))
         logger.debug('Test data loaded completely from: %s', file_path)
         return df
     except FileNotFoundError as e:
@@ -86,19 +78,104 @@ def load_data(file_path: str) -> pd.DataFrame:
         logger.error('Error occured during test data loading')
         raise
 
+# counting (true, predicted) pairs of one batch
+def confusion_counts(y_true, y_pred) -> np.ndarray:
+    """2x2 confusion matrix of one batch with a single bincount."""
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(y_true * len(LABELS) + y_pred, minlength=len(LABELS) ** 2).reshape(len(LABELS), len(LABELS))
+
+
+def _safe_divide(numerator, denominator):
+    """Elementwise division that yields 0 where the denominator is 0 (like sklearn's zero_division)."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator != 0)
+
+
+# deriving every metric from the confusion matrix
+def metrics_from_confusion(conf_matrix: np.ndarray) -> dict:
+    """
+    Accuracy, confusion matrix and a classification report in the same layout as
+    sklearn's classification_report(output_dict=True), all computed from the counts.
+    """
+    conf_matrix = np.asarray(conf_matrix)
+    true_positive = np.diag(conf_matrix)
+    support = conf_matrix.sum(axis=1)
+    predicted = conf_matrix.sum(axis=0)
+    total = conf_matrix.sum()
+    precision = _safe_divide(true_positive, predicted)
+    recall = _safe_divide(true_positive, support)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    accuracy = float(true_positive.sum() / total) if total else 0.0
+
+    classfic_report = {}
+    for i, label in enumerate(LABELS):
+        classfic_report[str(label)] = {
+            'precision': float(precision[i]), 'recall': float(recall[i]),
+            'f1-score': float(f1[i]), 'support': float(support[i]),
+        }
+    classfic_report['accuracy'] = accuracy
+    weights = _safe_divide(support, total)
+    for name, w in (('macro avg', np.full(len(LABELS), 1 / len(LABELS))), ('weighted avg', weights)):
+        classfic_report[name] = {
+            'precision': float(precision @ w), 'recall': float(recall @ w),
+            'f1-score': float(f1 @ w), 'support': float(total),
+        }
+    return {
+        'accuracy': accuracy,
+        'conf_matrix': conf_matrix.tolist(),
+        'classfic_report': classfic_report,
+    }
+
+
+# confidence intervals without a Python loop over resamples
+def bootstrap_intervals(conf_matrix: np.ndarray, n_resamples: int, confidence: float, seed: int) -> dict:
+    """
+    Bootstrap confidence intervals of accuracy, per-class precision/recall/F1 and macro F1.
+    Resampling n rows with replacement only changes how many rows fall in each confusion
+    cell, which is a multinomial draw; all resamples are drawn as one (n_resamples, 4)
+    matrix and every metric is computed column-wise on it.
+    """
+    try:
+        counts = np.asarray(conf_matrix, dtype=np.float64).ravel()
+        total = counts.sum()
+        if total == 0:
+            raise ValueError('cannot bootstrap an empty test set (the confusion matrix has no rows)')
+        rng = np.random.default_rng(seed)
+        resampled = rng.multinomial(int(total), counts / total, size=n_resamples).astype(np.float64)
+        tn, fp, fn, tp = resampled.T
+
+        samples = {'accuracy': (tn + tp) / total}
+        f1_scores = []
+        for label, (hit, false_alarm, miss) in (('0', (tn, fn, fp)), ('1', (tp, fp, fn))):
+            precision = _safe_divide(hit, hit + false_alarm)
+            recall = _safe_divide(hit, hit + miss)
+            f1 = _safe_divide(2 * precision * recall, precision + recall)
+            samples[f'precision_{label}'] = precision
+            samples[f'recall_{label}'] = recall
+            samples[f'f1_{label}'] = f1
+            f1_scores.append(f1)
+        samples['macro_f1'] = np.mean(f1_scores, axis=0)
+
+        alpha = (1 - confidence) / 2
+        intervals = {}
+        for name, values in samples.items():
+            low, high = np.quantile(values, [alpha, 1 - alpha])
+            intervals[name] = {'low': float(low), 'high': float(high)}
+        return {'confidence': confidence, 'n_resamples': n_resamples, 'intervals': intervals}
+    except Exception as e:
+        logger.error('Error occured during bootstrap: %s', e)
+        raise
+
+
 # evaluation of trained model on test data
 def evaluate_model(model, X_test: pd.DataFrame, y_test: pd.Series) -> dict:
     """Evaluation of the model and return evaluation matrices"""
     try:
         y_pred = model.predict(X_test)
-        accuracy = accuracy_score(y_test, y_pred)
-        conf_matrix = confusion_matrix(y_test, y_pred).tolist()
-        classfic_report = classification_report(y_test, y_pred, output_dict=True)
-        matric_dict = {
-            'accuracy': accuracy,
-            'conf_matrix': conf_matrix,
-            'classfic_report': classfic_report
-        }
+        matric_dict = metrics_from_confusion(confusion_counts(y_test, y_pred))
         logger.debug('Model evaluation completed')
         return matric_dict
     except Exception as e:
@@ -106,6 +183,223 @@ def evaluate_model(model, X_test: pd.DataFrame, y_test: pd.Series) -> dict:
         raise
 
 
+# evaluation over a streamed test set
+def evaluate_streaming(model, chunks, features: list) -> dict:
+    """
+    Single pass over chunks of test data: predict each chunk, add its counts to the
+    confusion matrix and derive all metrics from it at the end. Only one chunk is in memory.
+    """
+    try:
+        conf_matrix = np.zeros((len(LABELS), len(LABELS)), dtype=np.int64)
+        for chunk in chunks:
+            conf_matrix += confusion_counts(chunk['Survived'], model.predict(chunk[features]))
+        logger.debug('Streaming evaluation completed over %d rows', conf_matrix.sum())
+        return metrics_from_confusion(conf_matrix)
+    except Exception as e:
+        logger.error('Error occured during streaming model evaluation: %s', e)
+        raise
+
+
+# survival probabilities of the test set, batch or chunk by chunk
+def positive_scores(model, X: pd.DataFrame) -> np.ndarray:
+    """predict_proba of the survived class, one model call."""
+    return model.predict_proba(X)[:, list(model.classes_).index(1)]
+
+
+def collect_scores(model, chunks, features: list) -> tuple:
+    """(labels, survival probabilities) of every row of the chunks, one chunk in memory at a time."""
+    labels, scores = [], []
+    for chunk in chunks:
+        labels.append(chunk['Survived'].to_numpy(dtype=np.int8))
+        scores.append(positive_scores(model, chunk[features]))
+    return np.concatenate(labels), np.concatenate(scores)
+
+
+def _curve_points(n_points: int, max_points: int) -> np.ndarray:
+    """Indices of at most max_points evenly spread points of a curve, first and last included."""
+    if n_points <= max_points:
+        return np.arange(n_points)
+    return np.unique(np.linspace(0, n_points - 1, max_points).round().astype(np.int64))
+
+
+# every threshold at once from one sort of the scores
+def threshold_sweep(y_true, scores, cost_ratios: list, n_bins: int, max_curve_points: int) -> dict:
+    """
+    ROC and precision-recall curves, the cheapest threshold per cost ratio and
+    calibration bins of the survival probabilities, without a loop over thresholds.
+    The scores are sorted once, descending; cumulative sums of the sorted labels give
+    the true/false positives of "survived if score >= t" for every distinct score t.
+    A cost ratio r is the cost of a false negative relative to a false positive, so
+    the best threshold minimizes FP + r * FN. Curves are thinned to max_curve_points.
+    """
+    try:
+        y_true = np.asarray(y_true, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        order = np.argsort(-scores, kind='stable')
+        sorted_scores = scores[order]
+        true_pos = np.cumsum(y_true[order])
+        false_pos = np.arange(1, len(scores) + 1) - true_pos
+
+        # last row of every run of equal scores: all of them are above that threshold
+        last = np.flatnonzero(np.r_[sorted_scores[1:] != sorted_scores[:-1], True])
+        # the first point predicts nobody survived, its threshold is just above the top score
+        thresholds = np.r_[np.nextafter(sorted_scores[0], np.inf), sorted_scores[last]]
+        true_pos = np.r_[0, true_pos[last]]
+        false_pos = np.r_[0, false_pos[last]]
+        positives, negatives = true_pos[-1], false_pos[-1]
+        false_neg = positives - true_pos
+
+        tpr = _safe_divide(true_pos, positives)
+        fpr = _safe_divide(false_pos, negatives)
+        # precision of an empty prediction is 1, as in sklearn's precision_recall_curve
+        precision = np.r_[1.0, _safe_divide(true_pos[1:], true_pos[1:] + false_pos[1:])]
+        roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+        average_precision = float(np.sum(np.diff(tpr) * precision[1:]))
+
+        best_thresholds = {}
+        for ratio in cost_ratios:
+            cost = false_pos + ratio * false_neg
+            best = int(np.argmin(cost))
+            best_thresholds[str(ratio)] = {
+                'threshold': float(thresholds[best]),
+                'cost_per_row': float(cost[best] / len(scores)),
+                'accuracy': float((true_pos[best] + negatives - false_pos[best]) / len(scores)),
+                'precision': float(precision[best]),
+                'recall': float(tpr[best]),
+                'false_positives': int(false_pos[best]),
+                'false_negatives': int(false_neg[best]),
+            }
+
+        # reliability curve: equal-width probability bins, counted with bincount
+        bins = np.clip((scores * n_bins).astype(np.int64), 0, n_bins - 1)
+        counts = np.bincount(bins, minlength=n_bins)
+        mean_predicted = _safe_divide(np.bincount(bins, weights=scores, minlength=n_bins), counts)
+        fraction_positive = _safe_divide(np.bincount(bins, weights=y_true, minlength=n_bins), counts)
+        calibration = [{'bin_low': i / n_bins, 'bin_high': (i + 1) / n_bins, 'count': int(counts[i]),
+                        'mean_predicted': float(mean_predicted[i]), 'fraction_positive': float(fraction_positive[i])}
+                       for i in range(n_bins) if counts[i]]
+
+        points = _curve_points(len(thresholds), max_curve_points)
+        return {
+            'roc_auc': roc_auc,
+            'average_precision': average_precision,
+            'brier_score': float(np.mean((scores - y_true) ** 2)),
+            'expected_calibration_error': float(np.sum(counts * np.abs(mean_predicted - fraction_positive)) / len(scores)),
+            'best_thresholds': best_thresholds,
+            'calibration': calibration,
+            'curves': [{'threshold': float(thresholds[i]), 'fpr': float(fpr[i]), 'tpr': float(tpr[i]),
+                        'precision': float(precision[i])} for i in points],
+        }
+    except Exception as e:
+        logger.error('Error occured during the threshold sweep: %s', e)
+        raise
+
+
+# the decision threshold that goes with the evaluated model
+def save_threshold(threshold_info: dict, file_path: str) -> None:
+    """Write the chosen threshold (or null for the model's own 0.5 rule) with the hash of model.pkl it was tuned for."""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(threshold_info, file, indent=4)
+        logger.debug('Decision threshold saved to %s', file_path)
+    except Exception as e:
+        logger.error('Error occured during saving the decision threshold: %s', e)
+        raise
+
+
+# shipping the tuned threshold with the registered model
+def register_threshold(registry_params: dict, threshold_path: str, model_sha256: str) -> str:
+    """
+    Publish the current registry version again, with threshold.json added, and make
+    it current, so servers hot-reload the threshold together with the model. Versions
+    are never changed in place. Skipped (None) if the current version holds another model.
+    """
+    try:
+        registry_dir = registry_params['path']
+        version = current_version(registry_dir)
+        if version is None:
+            logger.warning('No registered model version to add the threshold to')
+            return None
+        meta = read_meta(registry_dir, version)
+        if meta['files'][BUNDLE_FILES['model']] != model_sha256:
+            logger.warning('Registry version %s holds a different model, threshold not registered', version)
+            return None
+        source_paths = {key: os.path.join(registry_dir, version, file_name) for key, file_name in BUNDLE_FILES.items()}
+        source_paths['threshold'] = threshold_path
+        metadata = {key: value for key, value in meta.items() if key not in ('version', 'created_at', 'files')}
+        new_version = publish_version(registry_dir, source_paths, metadata={**metadata, 'threshold_of': version},
+                                      keep_versions=registry_params['keep_versions'])
+        logger.debug('Threshold registered with the model of %s as version %s', version, new_version)
+        return new_version
+    except Exception as e:
+        logger.error('Error occured during threshold registration: %s', e)
+        raise
+
+
+# per-fold scores summarized by cross-validation
+def fold_scores(metrics: dict) -> dict:
+    """Accuracy, precision/recall/f1 of the survived class and macro f1 of one evaluation"""
+    report = metrics['classfic_report']
+    return {
+        'accuracy': metrics['accuracy'],
+        'precision': report['1']['precision'],
+        'recall': report['1']['recall'],
+        'f1': report['1']['f1-score'],
+        'macro_f1': report['macro avg']['f1-score'],
+    }
+
+
+def _fit_evaluate_fold(fold: int, features: list, build_params: dict) -> tuple:
+    """Worker: train_model on one fold of the shared matrix and evaluate_model on its held-out rows."""
+    arrays = worker_arrays()
+    train_idx, valid_idx = fold_indices(arrays, fold)
+    X, y = arrays['X'], arrays['y']
+    train_df = pd.DataFrame(X[train_idx], columns=features).assign(Survived=y[train_idx])
+    # one thread per fold, the folds themselves run side by side
+    with threadpool_limits(limits=1):
+        start = time.perf_counter()
+        model = train_model(train_df, build_params)
+        fit_time = time.perf_counter() - start
+        metrics = evaluate_model(model, pd.DataFrame(X[valid_idx], columns=features), y[valid_idx])
+    return fold, metrics, fit_time
+
+
+# k-fold cross-validation of the training procedure on a process pool
+def cross_validate(df: pd.DataFrame, features: list, build_params: dict, cv_params: dict) -> dict:
+    """
+    Stratified k-fold cross-validation of model_building.train_model. The fold indices
+    are computed once and shared with the workers together with the feature matrix as
+    memory-mapped .npy files, every fold is fitted and evaluated in its own worker.
+    Returns the mean and std of every fold_scores() metric plus the per-fold scores.
+    """
+    try:
+        # the common dtype of the compact feature columns, as sklearn picks it in train_model
+        X = df[features].to_numpy(dtype=np.result_type(*df[features].dtypes))
+        y = df['Survived'].to_numpy()
+        folds = list(StratifiedKFold(n_splits=cv_params['folds'], shuffle=True,
+                                     random_state=cv_params['random_state']).split(X, y))
+        fold_results = [None] * len(folds)
+        with SharedArrays({'X': X, 'y': y, **fold_arrays(folds)}) as shared, \
+                make_pool(shared, cv_params['n_jobs']) as pool:
+            futures = [pool.submit(_fit_evaluate_fold, fold, features, build_params) for fold in range(len(folds))]
+            for future in futures:
+                fold, metrics, fit_time = future.result()
+                fold_results[fold] = {'fold': fold, 'fit_time': fit_time, **fold_scores(metrics)}
+                logger.debug('Fold %d: accuracy %.4f (fit %.2fs)', fold, metrics['accuracy'], fit_time)
+
+        summary = {}
+        for name in CV_METRICS:
+            values = np.array([result[name] for result in fold_results])
+            summary[name] = {'mean': float(values.mean()), 'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0}
+        logger.debug('Cross-validated accuracy %.4f +/- %.4f over %d folds',
+                     summary['accuracy']['mean'], summary['accuracy']['std'], len(folds))
+        return {'folds': cv_params['folds'], 'summary': summary, 'per_fold': fold_results}
+    except Exception as e:
+        logger.error('Error occured during cross-validation: %s', e)
+        raise
+
+
 # saving evaluation matrics
 def save_reports(matrics: dict, file_path: str):
     """Save the evaluation matrics into a JSON file"""
@@ -122,30 +416,117 @@ def save_reports(matrics: dict, file_path: str):
 
 def main():
     """load model, evaluate it and save evaluation data, params in json file"""
+    configure_logging('model_evaluation')
     try:
+        monitor = StageMonitor('model_evaluation')
+        
         # loading params
         params = load_params('params.yaml')
         
         # loading model 
-        model = load_model('./models/model.pkl')
+        with monitor.track('load_model') as m:
+            model = cached_model(load_model('./models/model.pkl'), params['prediction_cache'], './models/model.pkl')
+            m.read('./models/model.pkl')
+        
+        eval_params = params['model_evaluation']
+        test_path = artifact_path('./data/engineered', 'test_engineered', params['data_format'])
+        features = list(model.feature_names_in_)
+        
+        if eval_params['streaming']:
+            # one pass over the test set, chunk by chunk
+            with monitor.track('evaluate_streaming') as m:
+                chunks = iter_frames(test_path, eval_params['chunk_size'], columns=features + ['Survived'])
+                metrics = evaluate_streaming(model, chunks, features)
+                m.read(test_path)
+                m.rows_in = int(np.sum(metrics['conf_matrix']))
+        else:
+            # loading test data
+            with monitor.track('load_data') as m:
+                df = load_data(test_path, columns=features + ['Survived'])
+                m.read(test_path)
+                m.rows_out = len(df)
+            
+            # slitting data into feature and target
+            X_test_data = df[features]
+            y_test_data = df['Survived']
+            
+            # evaluating the trained model on test data
+            with monitor.track('evaluate_model', rows_in=len(df)):
+                metrics = evaluate_model(model, X_test_data, y_test_data)
+        
+        if isinstance(model, PredictionCache):
+            logger.debug('Prediction cache: %s', model.stats())
         
-        # loading test data
-        df = load_data('./data/engineered/test_engineered.csv')
+        # confidence intervals from the confusion matrix
+        bootstrap_params = eval_params['bootstrap']
+        with monitor.track('bootstrap_intervals'):
+            metrics['bootstrap'] = bootstrap_intervals(metrics['conf_matrix'], bootstrap_params['n_resamples'],
+                                                       bootstrap_params['confidence'],
+                                                       bootstrap_params['random_state'])
         
-        # slitting data into feature and target
-        features = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked_Q', 'Embarked_S']
-        X_test_data = df[features]
-        y_test_data = df['Survived']
+        # every decision threshold from one sort of the test scores
+        sweep_params = eval_params['threshold_sweep']
+        sweep = None
+        threshold_info = {'threshold': None, 'cost_ratio': None, 'model_sha256': file_sha256('./models/model.pkl')}
+        if sweep_params['enabled']:
+            with monitor.track('threshold_sweep') as m:
+                if eval_params['streaming']:
+                    # a second pass over the test file, the first one only kept confusion counts
+                    chunks = iter_frames(test_path, eval_params['chunk_size'], columns=features + ['Survived'])
+                    y_sweep, scores = collect_scores(model, chunks, features)
+                    m.read(test_path)
+                else:
+                    y_sweep, scores = y_test_data.to_numpy(), positive_scores(model, X_test_data)
+                m.rows_in = len(scores)
+                cost_ratios = [float(ratio) for ratio in sweep_params['cost_ratios'] + [sweep_params['select_cost_ratio']]]
+                sweep = threshold_sweep(y_sweep, scores, cost_ratios, sweep_params['calibration_bins'],
+                                        sweep_params['max_curve_points'])
+            selected = sweep['best_thresholds'][str(float(sweep_params['select_cost_ratio']))]
+            threshold_info.update(threshold=selected['threshold'], cost_ratio=float(sweep_params['select_cost_ratio']))
+            logger.debug('ROC AUC %.4f, threshold %.4f for cost ratio %s',
+                         sweep['roc_auc'], selected['threshold'], sweep_params['select_cost_ratio'])
+            save_reports(sweep, './reports/threshold_sweep.json')
+        save_threshold(threshold_info, './models/threshold.json')
+        if params['model_registry']['enabled'] and threshold_info['threshold'] is not None:
+            register_threshold(params['model_registry'], './models/threshold.json', threshold_info['model_sha256'])
         
-        # evaluating the trained model on test data
-        metrics = evaluate_model(model, X_test_data, y_test_data)
+        # cross-validating the training procedure on the training split
+        cv_params = eval_params['cross_validation']
+        cv_report = None
+        if cv_params['enabled']:
+            train_path = artifact_path('./data/engineered', 'train_engineered', params['data_format'])
+            with monitor.track('load_cv_data') as m:
+                train_df = load_data(train_path, columns=features + ['Survived'])
+                m.read(train_path)
+                m.rows_out = len(train_df)
+            with monitor.track('cross_validate', rows_in=len(train_df)):
+                cv_report = cross_validate(train_df, features, params['model_building'], cv_params)
+            save_reports(cv_report, './reports/cv_metrics.json')
         
         # trackinh the meta-data of the experiments using dvclive
         with Live(save_dvc_exp=True) as live:
             live.log_metric('accuracy', metrics['accuracy'])
+            if cv_report is not None:
+                for name, stats in cv_report['summary'].items():
+                    live.log_metric(f'cv/{name}/mean', stats['mean'], plot=False)
+                    live.log_metric(f'cv/{name}/std', stats['std'], plot=False)
+            if sweep is not None:
+                for name in ('roc_auc', 'average_precision', 'brier_score', 'expected_calibration_error'):
+                    live.log_metric(f'threshold_sweep/{name}', sweep[name], plot=False)
+                live.log_plot('roc', sweep['curves'], x='fpr', y='tpr', template='simple', title='ROC curve',
+                              x_label='false positive rate', y_label='true positive rate')
+                live.log_plot('precision_recall', sweep['curves'], x='tpr', y='precision', template='simple',
+                              title='Precision-recall curve', x_label='recall', y_label='precision')
+                live.log_plot('calibration', sweep['calibration'], x='mean_predicted', y='fraction_positive',
+                              template='simple', title='Reliability curve',
+                              x_label='mean predicted probability', y_label='fraction survived')
+            for name, interval in metrics['bootstrap']['intervals'].items():
+                live.log_metric(f'bootstrap/{name}/low', interval['low'], plot=False)
+                live.log_metric(f'bootstrap/{name}/high', interval['high'], plot=False)
             # saving detailed rport as artifacts
             cm_path = './reports/confusion_metrix.json'
             cr_path = './reports/classification_report.json'
+            os.makedirs('./reports', exist_ok=True)
             
             # dumping confusion metrix in a json file
             with open(cm_path, 'w') as f:
@@ -163,6 +544,7 @@ def main():
             live.log_params(params)
         
         save_reports(metrics, './reports/metrics.json')
+        monitor.publish()
         logger.debug('Model evaluation operation completed.')
     except Exception as e:
         logger.error('Failed to complete model evaluation: %s', e)
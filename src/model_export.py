@@ -0,0 +1,101 @@
+import numpy as np
+import os
+import pickle
+
+from feature_engineer import DECKS, TITLE_GROUPS, TITLES
+from model_files import file_sha256
+from linear_scorer import write_linear_model
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('model_export')
+
+
+# loading a pickled object (model or preprocessor)
+def load_pickle(file_path: str):
+    """Load a pickled model/preprocessor"""
+    try:
+        with open(file_path, 'rb') as file:
+            obj = pickle.load(file)
+        logger.debug('Loaded %s', file_path)
+        return obj
+    except FileNotFoundError:
+        logger.error('File not found: %s', file_path)
+        raise
+    except Exception as e:
+        logger.error('Error occured during loading %s: %s', file_path, e)
+        raise
+
+
+# reducing a fitted sklearn model to raw coefficients
+def linear_weights(model) -> tuple:
+    """
+    Return (features, coef, intercept) of a binary linear model. A leading
+    StandardScaler (incremental training) is folded into the weights, so the
+    exported model works on unscaled features.
+    """
+    try:
+        features = list(model.feature_names_in_)
+        scaler = None
+        if hasattr(model, 'steps'):
+            if len(model.steps) > 2 or (len(model.steps) == 2 and not hasattr(model.steps[0][1], 'scale_')):
+                raise ValueError('Only a linear model optionally preceded by a StandardScaler can be exported')
+            scaler = model.steps[0][1] if len(model.steps) == 2 else None
+            model = model.steps[-1][1]
+        if not hasattr(model, 'coef_') or model.coef_.shape[0] != 1:
+            raise ValueError(f'{type(model).__name__} is not a binary linear model')
+        coef = model.coef_[0].astype(np.float64)
+        intercept = float(model.intercept_[0])
+        if scaler is not None:
+            # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - w . mean / scale)
+            coef = coef / scaler.scale_
+            intercept -= float(np.dot(coef, scaler.mean_))
+        return features, coef, intercept
+    except Exception as e:
+        logger.error('Error occured during weight extraction: %s', e)
+        raise
+
+
+# writing the compact model file
+def export_model(model, preprocessor, file_path: str, engineer=None, source_sha256: str = None) -> None:
+    """
+    Export the model weights, preprocessing and feature engineering constants for LinearScorer,
+    with the hash of the model.pkl they come from (matched against models/threshold.json)
+    """
+    try:
+        features, coef, intercept = linear_weights(model)
+        preprocessing = {
+            'age_median': preprocessor.age_median,
+            'embarked_mode': preprocessor.embarked_mode,
+            'embarked_categories': preprocessor.embarked_categories,
+        }
+        if engineer is not None:
+            preprocessing.update({
+                'title_groups': TITLE_GROUPS,
+                'titles': TITLES,
+                'decks': DECKS,
+                'ticket_counts': engineer.ticket_counts,
+            })
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_linear_model(file_path, features, coef, intercept, preprocessing, source_sha256)
+        logger.debug('Exported %d weights to %s (%d bytes)', len(coef) + 1, file_path, os.path.getsize(file_path))
+    except Exception as e:
+        logger.error('Error occured during model export: %s', e)
+        raise
+
+
+def main():
+    """Export models/model.pkl, models/preprocessor.pkl and models/feature_engineer.pkl to models/model.bin"""
+    configure_logging('model_export')
+    try:
+        model = load_pickle('./models/model.pkl')
+        preprocessor = load_pickle('./models/preprocessor.pkl')
+        engineer = load_pickle('./models/feature_engineer.pkl')
+        export_model(model, preprocessor, './models/model.bin', engineer, file_sha256('./models/model.pkl'))
+        logger.debug('Model export operation completed.')
+    except Exception as e:
+        logger.error('Failed to complete model export: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import json
+import hashlib
+import logging
+
+# Helpers around model artifacts shared by the stages and the fast-start scorer
+# (score.py). Standard library only, so importing this module stays cheap.
+
+# module logger; get_logger() would pull in log_config and yaml, this is the same logger setup
+logger = logging.getLogger('model_files')
+logger.setLevel(logging.DEBUG)
+
+
+# hashing a file without reading it into memory at once
+def file_sha256(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# loading the decision threshold model_evaluation tuned
+def load_threshold(threshold_path: str, model_sha256: str):
+    """
+    Survival threshold saved for this model, None (the model's own 0.5 rule) if there
+    is none or it was tuned for a different model.pkl.
+    """
+    try:
+        with open(threshold_path, 'r') as file:
+            threshold_info = json.load(file)
+    except FileNotFoundError:
+        logger.debug('No decision threshold at %s', threshold_path)
+        return None
+    if threshold_info['threshold'] is None:
+        return None
+    if threshold_info['model_sha256'] != model_sha256:
+        logger.warning('Ignoring %s, it was tuned for a different model', threshold_path)
+        return None
+    logger.debug('Decision threshold %.4f (cost ratio %s)', threshold_info['threshold'], threshold_info['cost_ratio'])
+    return float(threshold_info['threshold'])
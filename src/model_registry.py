@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import pickle
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from log_config import get_logger
+from model_files import file_sha256, load_threshold
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('model_registry')
+
+# files that make up one model version: everything a scorer needs
+BUNDLE_FILES = {
+    'model': 'model.pkl',
+    'preprocessor': 'preprocessor.pkl',
+    'engineer': 'feature_engineer.pkl',
+}
+# files a version may carry as well: the decision threshold model_evaluation tuned
+OPTIONAL_FILES = {
+    'threshold': 'threshold.json',
+}
+POINTER = 'CURRENT'
+VERSION_PREFIX = 'v'
+
+
+def _write_atomic(file_path: str, text: str) -> None:
+    """Write a small file through a temp file and rename, readers never see half of it."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix='.tmp-')
+    with os.fdopen(fd, 'w') as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, file_path)
+
+
+def list_versions(registry_dir: str) -> list:
+    """Published versions, oldest first (in-progress temp directories are skipped)."""
+    if not os.path.isdir(registry_dir):
+        return []
+    versions = [name for name in os.listdir(registry_dir)
+                if name.startswith(VERSION_PREFIX) and name[len(VERSION_PREFIX):].isdigit()]
+    return sorted(versions, key=lambda name: int(name[len(VERSION_PREFIX):]))
+
+
+def current_version(registry_dir: str) -> str:
+    """Version the CURRENT pointer names, None if nothing was published yet."""
+    try:
+        with open(os.path.join(registry_dir, POINTER), 'r') as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(registry_dir: str, version: str) -> None:
+    """Point CURRENT at a published version (atomic, e.g. to roll back)."""
+    if not os.path.isdir(os.path.join(registry_dir, version)):
+        raise FileNotFoundError(f'Model version {version} does not exist in {registry_dir}')
+    _write_atomic(os.path.join(registry_dir, POINTER), version + '\n')
+
+
+def read_meta(registry_dir: str, version: str) -> dict:
+    """meta.json of a published version."""
+    with open(os.path.join(registry_dir, version, 'meta.json'), 'r') as file:
+        return json.load(file)
+
+
+def publish_version(registry_dir: str, source_paths: dict, metadata: dict = None,
+                    keep_versions: int = None, make_current: bool = True) -> str:
+    """
+    Copy the bundle files (BUNDLE_FILES key -> path, plus any OPTIONAL_FILES given)
+    into a new version directory and point CURRENT at it. The directory is filled under a temp name and renamed into
+    place, so a version either exists completely or not at all. Versions beyond the
+    newest keep_versions are removed (never the current one). Returns the version name.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=registry_dir, prefix='.tmp-')
+    try:
+        files = {}
+        bundle_files = {**BUNDLE_FILES, **{key: file_name for key, file_name in OPTIONAL_FILES.items()
+                                           if key in source_paths}}
+        for key, file_name in bundle_files.items():
+            shutil.copyfile(source_paths[key], os.path.join(staging, file_name))
+            files[file_name] = file_sha256(os.path.join(staging, file_name))
+        meta = {'created_at': datetime.now(timezone.utc).isoformat(), 'files': files, **(metadata or {})}
+
+        # another publisher may take the same number: retry with the next one
+        while True:
+            existing = list_versions(registry_dir)
+            number = int(existing[-1][len(VERSION_PREFIX):]) + 1 if existing else 1
+            version = f'{VERSION_PREFIX}{number:04d}'
+            _write_atomic(os.path.join(staging, 'meta.json'), json.dumps({'version': version, **meta}, indent=4))
+            try:
+                os.rename(staging, os.path.join(registry_dir, version))
+                break
+            except OSError:
+                if not os.path.exists(os.path.join(registry_dir, version)):
+                    raise
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current(registry_dir, version)
+    if keep_versions:
+        current = current_version(registry_dir)
+        for old in list_versions(registry_dir)[:-keep_versions]:
+            if old != current:
+                shutil.rmtree(os.path.join(registry_dir, old), ignore_errors=True)
+    logger.debug('Published model version %s to %s', version, registry_dir)
+    return version
+
+
+class ModelBundle:
+    """
+    One loaded model version: the model with the preprocessor and feature engineer it
+    was trained with and its decision threshold (None: the model's own 0.5 rule).
+    Never changed after loading; a new version is a new bundle, so a batch that took
+    a bundle keeps scoring with it while a newer one is swapped in.
+    """
+
+    __slots__ = ('version', 'model', 'preprocessor', 'engineer', 'meta', 'threshold')
+
+    def __init__(self, version: str, model, preprocessor, engineer, meta: dict, threshold: float = None):
+        for name, value in zip(self.__slots__, (version, model, preprocessor, engineer, meta, threshold)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ModelBundle is immutable')
+
+
+def load_bundle(registry_dir: str, version: str = None, wrap_model=None) -> ModelBundle:
+    """
+    Load a version (default: CURRENT) into a ModelBundle. The files are checked
+    against the hashes in meta.json. wrap_model(model) may put something in front
+    of the model, e.g. a prediction cache per version.
+    """
+    version = version or current_version(registry_dir)
+    if version is None:
+        raise FileNotFoundError(f'No model version has been published to {registry_dir}')
+    version_dir = os.path.join(registry_dir, version)
+    meta = read_meta(registry_dir, version)
+    threshold = None
+    if OPTIONAL_FILES['threshold'] in meta['files']:
+        threshold_path = os.path.join(version_dir, OPTIONAL_FILES['threshold'])
+        if file_sha256(threshold_path) != meta['files'][OPTIONAL_FILES['threshold']]:
+            raise ValueError(f'{threshold_path} does not match the hash recorded for version {version}')
+        threshold = load_threshold(threshold_path, meta['files'][BUNDLE_FILES['model']])
+    objects = {}
+    for key, file_name in BUNDLE_FILES.items():
+        file_path = os.path.join(version_dir, file_name)
+        if file_sha256(file_path) != meta['files'][file_name]:
+            raise ValueError(f'{file_path} does not match the hash recorded for version {version}')
+        with open(file_path, 'rb') as file:
+            objects[key] = pickle.load(file)
+    model = wrap_model(objects['model']) if wrap_model is not None else objects['model']
+    return ModelBundle(version, model, objects['preprocessor'], objects['engineer'], meta, threshold)
+
+
+class HotReloader:
+    """
+    Keeps the CURRENT model version loaded. A background thread polls the pointer
+    every poll_interval_s and, when it names a new version, loads that bundle off the
+    request path and swaps the reference. Scorers call current() once per batch, so
+    in-flight batches finish on the old version and nothing waits for a load.
+    A version that fails to load is logged and the old one stays in service.
+    """
+
+    def __init__(self, registry_dir: str, poll_interval_s: float = 2.0, wrap_model=None):
+        self.registry_dir = registry_dir
+        self.poll_interval_s = poll_interval_s
+        self.wrap_model = wrap_model
+        self.reloads = 0
+        self._failed_version = None
+        self._bundle = load_bundle(registry_dir, wrap_model=wrap_model)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current(self) -> ModelBundle:
+        # a single reference read: the bundle is immutable and swapped as a whole
+        return self._bundle
+
+    def check(self) -> bool:
+        """Load and swap in the CURRENT version if it changed; True if a new one was swapped in."""
+        version = current_version(self.registry_dir)
+        if version is None or version in (self._bundle.version, self._failed_version):
+            return False
+        try:
+            start = time.perf_counter()
+            bundle = load_bundle(self.registry_dir, version, wrap_model=self.wrap_model)
+        except Exception as e:
+            # not retried until CURRENT names another version
+            self._failed_version = version
+            logger.error('Could not load model version %s, keeping %s: %s', version, self._bundle.version, e)
+            return False
+        previous, self._bundle = self._bundle, bundle
+        self.reloads += 1
+        logger.info('Swapped model version %s -> %s (loaded in %.3fs)',
+                    previous.version, bundle.version, time.perf_counter() - start)
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval_s):
+            self.check()
+
+    def start(self) -> 'HotReloader':
+        self._thread = threading.Thread(target=self._watch, name='model-hot-reload', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
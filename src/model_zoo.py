@@ -0,0 +1,215 @@
+import pandas as pd
+import numpy as np
+import os
+import json
+import time
+import pickle
+import yaml
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+from threadpoolctl import threadpool_limits
+from data_io import artifact_path, read_frame
+from instrumentation import StageMonitor
+from model_building import fit_converged
+from model_evaluation import evaluate_model
+from parallel import SharedArrays, make_pool, worker_arrays
+from schema import enforce_schema, processed_schema
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('model_zoo')
+
+# estimator names usable in params.yaml model_zoo.models
+ESTIMATORS = {
+    'logistic_regression': LogisticRegression,
+    'gradient_boosting': HistGradientBoostingClassifier,
+    'random_forest': RandomForestClassifier,
+    'linear_svm': LinearSVC,
+}
+
+
+# method to load params from params.yaml
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+# method to load data from a path
+def load_data(data_path: str, columns: list = None) -> pd.DataFrame:
+    """Load CSV/Parquet data (only `columns` if given) from the given location in the compact schema dtypes."""
+    try:
+        df = read_frame(data_path, columns=columns)
+        df = enforce_schema(df, processed_schema(df.columns))
+        logger.debug('Data set loaded from %s', data_path)
+        return df
+    except Exception as e:
+        logger.error('Error occured during data loading from %s: %s', data_path, e)
+        raise
+
+
+# building an estimator from its params.yaml entry
+def make_estimator(spec: dict):
+    """
+    Estimator for one model_zoo.models entry: `estimator` names one of ESTIMATORS,
+    `params` are passed to it and `scale: true` puts a StandardScaler in front.
+    """
+    if spec['estimator'] not in ESTIMATORS:
+        raise ValueError(f'Unknown estimator: {spec["estimator"]}')
+    estimator = ESTIMATORS[spec['estimator']](**(spec.get('params') or {}))
+    if spec.get('scale', False):
+        return Pipeline([('scaler', StandardScaler()), ('classifier', estimator)])
+    return estimator
+
+
+def _fit_and_measure(name: str, spec: dict, features: list, latency_rows: int, latency_repeats: int) -> tuple:
+    """
+    Worker: fit one model on the shared training matrix, evaluate it on the shared
+    test matrix and time predict() on batches of latency_rows rows.
+    """
+    arrays = worker_arrays()
+    X_train = pd.DataFrame(arrays['X_train'], columns=features)
+    X_test = pd.DataFrame(arrays['X_test'], columns=features)
+    # every model gets one core, so fit times are comparable while the pool runs them side by side
+    with threadpool_limits(limits=1):
+        model = make_estimator(spec)
+        start = time.perf_counter()
+        converged = fit_converged(model, X_train, arrays['y_train'])
+        fit_time = time.perf_counter() - start
+
+        metrics = evaluate_model(model, X_test, arrays['y_test'])
+
+        # test rows repeated if the test set is smaller than one batch
+        batch = X_test.iloc[np.arange(latency_rows) % len(X_test)]
+        model.predict(batch)
+        timings = []
+        for _ in range(latency_repeats):
+            start = time.perf_counter()
+            model.predict(batch)
+            timings.append(time.perf_counter() - start)
+
+    return name, {
+        'estimator': spec['estimator'],
+        'converged': converged,
+        'accuracy': metrics['accuracy'],
+        'f1_survived': metrics['classfic_report']['1']['f1-score'],
+        'fit_time_s': fit_time,
+        'predict_ms_per_1k_rows': float(np.median(timings)) * 1000 * 1000 / latency_rows,
+        'model_size_bytes': len(pickle.dumps(model)),
+    }
+
+
+# marking the models no other model beats on both accuracy and latency
+def mark_pareto(results: dict) -> dict:
+    """
+    Set pareto_optimal on every result: no other model is as accurate and faster, or more
+    accurate and as fast. Models that did not converge are never optimal nor compared against.
+    """
+    for name, result in results.items():
+        result['pareto_optimal'] = result['converged'] and not any(
+            other['accuracy'] >= result['accuracy']
+            and other['predict_ms_per_1k_rows'] <= result['predict_ms_per_1k_rows']
+            and (other['accuracy'] > result['accuracy']
+                 or other['predict_ms_per_1k_rows'] < result['predict_ms_per_1k_rows'])
+            for other_name, other in results.items() if other_name != name and other['converged'])
+    return results
+
+
+# training and comparing the model zoo on a process pool
+def train_zoo(train_df: pd.DataFrame, test_df: pd.DataFrame, features: list, params: dict) -> dict:
+    """
+    Fit every model of params['models'] concurrently. The train and test matrices are
+    shared with the workers as memory-mapped .npy files (see parallel.SharedArrays).
+    Returns {name: accuracy, fit time, predict latency per 1K rows, pickle size, ...}
+    ordered by accuracy, models that did not converge last.
+    """
+    try:
+        # the common dtype of the compact feature columns, as sklearn picks it for model_building
+        dtype = np.result_type(*train_df[features].dtypes)
+        shared_data = {
+            'X_train': train_df[features].to_numpy(dtype=dtype),
+            'y_train': train_df['Survived'].to_numpy(),
+            'X_test': test_df[features].to_numpy(dtype=dtype),
+            'y_test': test_df['Survived'].to_numpy(),
+        }
+        results = {}
+        with SharedArrays(shared_data) as shared, make_pool(shared, params['n_jobs']) as pool:
+            futures = [pool.submit(_fit_and_measure, name, spec, features,
+                                   params['latency_rows'], params['latency_repeats'])
+                       for name, spec in params['models'].items()]
+            for future in futures:
+                name, result = future.result()
+                results[name] = result
+                logger.debug('%s: accuracy %.4f, fit %.2fs, %.3f ms per 1K rows, %d bytes', name,
+                             result['accuracy'], result['fit_time_s'], result['predict_ms_per_1k_rows'],
+                             result['model_size_bytes'])
+                if not result['converged']:
+                    logger.warning('%s did not converge, ranked after the converged models', name)
+        results = dict(sorted(results.items(), key=lambda item: (not item[1]['converged'], -item[1]['accuracy'])))
+        return mark_pareto(results)
+    except Exception as e:
+        logger.error('Error occured during model zoo training: %s', e)
+        raise
+
+
+# saving the comparison report
+def save_report(report: dict, file_path: str) -> None:
+    """Save the model comparison into a JSON file"""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug('Model zoo report saved to: %s', file_path)
+    except Exception as e:
+        logger.error('Error occured during saving the model zoo report: %s', e)
+        raise
+
+
+def main():
+    """Train the configured models side by side on the engineered data and compare them"""
+    configure_logging('model_zoo')
+    try:
+        monitor = StageMonitor('model_zoo')
+        all_params = load_params('params.yaml')
+        params = all_params['model_zoo']
+        features = all_params['model_building']['features']
+
+        # loading train and test data
+        with monitor.track('load_data') as m:
+            train_path = artifact_path('./data/engineered', 'train_engineered', all_params['data_format'])
+            test_path = artifact_path('./data/engineered', 'test_engineered', all_params['data_format'])
+            train_data = load_data(train_path, columns=features + ['Survived'])
+            test_data = load_data(test_path, columns=features + ['Survived'])
+            m.read(train_path)
+            m.read(test_path)
+            m.rows_out = len(train_data) + len(test_data)
+
+        # fitting, evaluating and timing every model
+        with monitor.track('train_zoo', rows_in=len(train_data) + len(test_data)):
+            report = train_zoo(train_data, test_data, features, params)
+
+        save_report(report, './reports/model_zoo.json')
+        monitor.publish()
+        logger.debug('Model zoo comparison completed.')
+    except Exception as e:
+        logger.error('Model zoo comparison failed: %s', e)
+        raise
+
+
+if __name__ == '__main__':
+    main()
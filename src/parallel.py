@@ -0,0 +1,88 @@
+import numpy as np
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from log_config import configure_worker_logging, worker_logging
+
+# arrays attached in a worker process by init_worker()
+_worker_arrays = {}
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    """Translate an sklearn-style n_jobs (-1 = all cores) into a worker count."""
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpu_count + 1 + n_jobs)
+    return min(n_jobs, cpu_count)
+
+
+class SharedArrays:
+    """
+    Dumps NumPy arrays to .npy files in a temp directory so worker processes
+    memory-map them instead of receiving a pickled copy each.
+    Use as a context manager; the files are removed on exit.
+    """
+
+    def __init__(self, arrays: dict):
+        self.directory = tempfile.mkdtemp(prefix='titanic-shared-')
+        self.paths = {}
+        for name, array in arrays.items():
+            path = os.path.join(self.directory, f'{name}.npy')
+            np.save(path, np.ascontiguousarray(array))
+            self.paths[name] = path
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def attach_arrays(paths: dict) -> dict:
+    """Open shared .npy files read-only as memory maps."""
+    return {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+
+def init_worker(paths: dict, logging_target=None) -> None:
+    """Process pool initializer: send log records to the parent, attach the shared arrays once per worker."""
+    global _worker_arrays
+    configure_worker_logging(logging_target)
+    _worker_arrays = attach_arrays(paths)
+
+
+def worker_arrays() -> dict:
+    """Shared arrays of the current worker process."""
+    return _worker_arrays
+
+
+def fold_arrays(folds: list) -> dict:
+    """
+    Precomputed (train, valid) index pairs as arrays SharedArrays can hold: the ragged
+    fold indices are padded into one matrix per side, with the real sizes alongside.
+    """
+    fold_train = np.zeros((len(folds), max(len(f[0]) for f in folds)), dtype=np.int64)
+    fold_valid = np.zeros((len(folds), max(len(f[1]) for f in folds)), dtype=np.int64)
+    for i, (train_idx, valid_idx) in enumerate(folds):
+        fold_train[i, :len(train_idx)] = train_idx
+        fold_valid[i, :len(valid_idx)] = valid_idx
+    return {
+        'fold_train': fold_train, 'fold_valid': fold_valid,
+        'fold_train_size': np.array([len(f[0]) for f in folds]),
+        'fold_valid_size': np.array([len(f[1]) for f in folds]),
+    }
+
+
+def fold_indices(arrays: dict, fold: int) -> tuple:
+    """(train, valid) indices of one fold from the arrays of fold_arrays()."""
+    return (arrays['fold_train'][fold][:arrays['fold_train_size'][fold]],
+            arrays['fold_valid'][fold][:arrays['fold_valid_size'][fold]])
+
+
+def make_pool(shared: SharedArrays, n_jobs: int) -> ProcessPoolExecutor:
+    """Process pool whose workers have `shared` attached (see worker_arrays()) and log through this process."""
+    return ProcessPoolExecutor(max_workers=resolve_n_jobs(n_jobs),
+                               initializer=init_worker, initargs=(shared.paths, worker_logging()))
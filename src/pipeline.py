@@ -0,0 +1,200 @@
+import os
+import ast
+import json
+import pickle
+import hashlib
+import tempfile
+import argparse
+
+import data_ingestion
+import data_preprocessing
+import feature_engineering
+import model_building
+import model_evaluation
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('pipeline')
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# stage name -> (stage module, params.yaml sections it reads); the code it runs is
+# the module with every local module it imports, see code_files()
+# logging setup does not change stage outputs (like the dvc.yaml deps)
+UNKEYED_MODULES = {'log_config.py'}
+STAGES = {
+    'data_ingestion': ('data_ingestion.py', ['data_ingestion']),
+    'data_preprocessing': ('data_preprocessing.py', ['data_preprocessing']),
+    'feature_engineering': ('feature_engineering.py', []),
+    'model_building': ('model_building.py', ['model_building']),
+    'model_evaluation': ('model_evaluation.py', []),
+}
+
+
+# finding the code a stage runs
+def code_files(module_file: str) -> list:
+    """
+    module_file and the src/ modules it imports, directly or through each other, in
+    sorted order. Imports anywhere in a module count, also those inside functions.
+    """
+    found = set()
+    pending = [module_file]
+    while pending:
+        file_name = pending.pop()
+        if file_name in found:
+            continue
+        found.add(file_name)
+        with open(os.path.join(SRC_DIR, file_name), 'r') as file:
+            tree = ast.parse(file.read(), filename=file_name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                local_file = name.split('.')[0] + '.py'
+                if local_file not in UNKEYED_MODULES and os.path.exists(os.path.join(SRC_DIR, local_file)):
+                    pending.append(local_file)
+    return sorted(found)
+
+
+# hashing everything a stage output depends on
+def stage_key(stage: str, params: dict, upstream_key: str) -> str:
+    """Hash of the stage code (see code_files), its params.yaml sections and the upstream key."""
+    module_file, param_sections = STAGES[stage]
+    digest = hashlib.sha256(stage.encode())
+    for code_file in code_files(module_file):
+        with open(os.path.join(SRC_DIR, code_file), 'rb') as file:
+            digest.update(file.read())
+    relevant_params = {section: params.get(section) for section in param_sections}
+    digest.update(json.dumps(relevant_params, sort_keys=True).encode())
+    digest.update(upstream_key.encode())
+    return digest.hexdigest()
+
+
+# returning a cached stage output or computing and storing it
+def memoized(stage: str, key: str, compute, cache_dir: str, force: bool = False):
+    """Load the output of `stage` for `key` from cache_dir, or run compute() and cache it."""
+    cache_path = os.path.join(cache_dir, f'{stage}-{key[:16]}.pkl')
+    if not force and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as file:
+                result = pickle.load(file)
+            logger.debug('Stage %s: cache hit (%s)', stage, cache_path)
+            return result
+        except Exception as e:
+            logger.warning('Stage %s: unreadable cache entry %s, recomputing: %s', stage, cache_path, e)
+
+    logger.debug('Stage %s: running', stage)
+    result = compute()
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temp file first so an interrupted run never leaves a broken entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.part')
+    with os.fdopen(fd, 'wb') as file:
+        pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return result
+
+
+def _preprocess(raw: tuple, sketch_params: dict) -> tuple:
+    train_data, test_data = raw
+    # fitted from the train sketches with the params.yaml sizes, like the dvc stage
+    preprocessor = data_preprocessing.Preprocessor().fit_profile(
+        data_preprocessing.profile_frame(train_data, **sketch_params))
+    return (data_preprocessing.preprocess_df(train_data, preprocessor),
+            data_preprocessing.preprocess_df(test_data, preprocessor),
+            preprocessor)
+
+
+def _engineer(preprocessed: tuple) -> tuple:
+    train_data, test_data = preprocessed[:2]
+    engineer = feature_engineering.FeatureEngineer().fit(train_data)
+    return (feature_engineering.engineer_df(train_data, engineer),
+            feature_engineering.engineer_df(test_data, engineer),
+            engineer)
+
+
+def _build_model(train_data, params: dict):
+    if params['incremental']['enabled']:
+        chunk_size = params['incremental']['chunk_size']
+        read_chunks = lambda: (train_data.iloc[i:i + chunk_size] for i in range(0, len(train_data), chunk_size))
+        return model_building.train_incremental(read_chunks, params)[0]
+    if params['search']['enabled']:
+        return model_building.search_model(train_data, params)[0]
+    return model_building.train_model(train_data, params)
+
+
+def _evaluate(model, test_data):
+    features = list(model.feature_names_in_)
+    return model_evaluation.evaluate_model(model, test_data[features], test_data['Survived'])
+
+
+# chaining all stages in one process
+def run_pipeline(params: dict, cache_dir: str, force: bool = False, until: str = None) -> dict:
+    """
+    Run ingestion -> preprocessing -> feature engineering -> model building -> evaluation
+    in memory. Every stage output is memoized under stage_key(), so only the stages whose
+    code, params or inputs changed are recomputed. Returns the outputs by stage name.
+    """
+    try:
+        ingestion_params = params['data_ingestion']
+        source_path = data_ingestion.resolve_source(**ingestion_params['source'])
+        # cached blobs are named by their SHA-256, so the file name is the content hash
+        upstream_key = os.path.basename(source_path)
+
+        steps = {
+            'data_ingestion': lambda: data_ingestion.split_data(
+                data_ingestion.load_data(source_path), ingestion_params),
+            'data_preprocessing': lambda: _preprocess(
+                outputs['data_ingestion'], params['data_preprocessing']['sketch']),
+            'feature_engineering': lambda: _engineer(outputs['data_preprocessing']),
+            'model_building': lambda: _build_model(
+                outputs['feature_engineering'][0], params['model_building']),
+            'model_evaluation': lambda: _evaluate(
+                outputs['model_building'], outputs['feature_engineering'][1]),
+        }
+
+        outputs = {}
+        for stage in STAGES:
+            upstream_key = stage_key(stage, params, upstream_key)
+            outputs[stage] = memoized(stage, upstream_key, steps[stage], cache_dir, force)
+            if stage == until:
+                break
+        logger.debug('Pipeline finished at stage %s', stage)
+        return outputs
+    except Exception as e:
+        logger.error('Pipeline run failed: %s', e)
+        raise
+
+
+def main():
+    """Run the whole pipeline in one process and save the final model and reports"""
+    configure_logging('pipeline')
+    try:
+        parser = argparse.ArgumentParser(description='In-process Titanic pipeline')
+        parser.add_argument('--force', action='store_true', help='ignore cached stage outputs')
+        parser.add_argument('--until', choices=list(STAGES), help='stop after this stage')
+        parser.add_argument('--cache-dir', default='.cache/pipeline', help='stage output cache')
+        args = parser.parse_args()
+
+        params = data_ingestion.load_params('params.yaml')
+        outputs = run_pipeline(params, args.cache_dir, force=args.force, until=args.until)
+
+        if 'data_preprocessing' in outputs:
+            data_preprocessing.save_preprocessor(outputs['data_preprocessing'][2], './models/preprocessor.pkl')
+        if 'feature_engineering' in outputs:
+            feature_engineering.save_engineer(outputs['feature_engineering'][2], './models/feature_engineer.pkl')
+        if 'model_building' in outputs:
+            model_building.save_model(outputs['model_building'], './models/model.pkl')
+        if 'model_evaluation' in outputs:
+            model_evaluation.save_reports(outputs['model_evaluation'], './reports/metrics.json')
+        logger.debug('In-process pipeline operation completed.')
+    except Exception as e:
+        logger.error('In-process pipeline failed: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import pandas as pd
+import numpy as np
+import pickle
+import argparse
+import yaml
+from data_io import FrameWriter, iter_frames
+from linear_explainer import explain_chunk
+from model_files import file_sha256, load_threshold
+from model_registry import load_bundle
+from prediction_cache import PredictionCache, cached_model
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('predict')
+
+
+# method to load params from params.yaml
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+# loading trained model (once per run)
+def load_model(model_path: str):
+    """Loading trained model"""
+    try:
+        with open(model_path, 'rb') as file:
+            model = pickle.load(file)
+        logger.debug('Trained model loaded from: %s', model_path)
+        return model
+    except FileNotFoundError:
+        logger.error('Model file not found: %s', model_path)
+        raise
+    except Exception as e:
+        logger.error('Error occured during model loading: %s', e)
+        raise
+
+
+# loading fitted preprocessor or feature engineer (once per run)
+def load_preprocessor(preprocessor_path: str):
+    """Loading a preprocessing step (preprocessor, feature engineer) fitted on the training split"""
+    try:
+        with open(preprocessor_path, 'rb') as file:
+            preprocessor = pickle.load(file)
+        logger.debug('Fitted preprocessing step loaded from: %s', preprocessor_path)
+        return preprocessor
+    except FileNotFoundError:
+        logger.error('Preprocessor file not found: %s', preprocessor_path)
+        raise
+    except Exception as e:
+        logger.error('Error occured during preprocessor loading: %s', e)
+        raise
+
+
+# preprocessing a chunk with whole-column operations
+def prepare_chunk(chunk: pd.DataFrame, preprocessor, features: list, engineer=None) -> pd.DataFrame:
+    """Apply the fitted preprocessor (and feature engineer) to a chunk and select the model features."""
+    try:
+        df = preprocessor.transform(chunk)
+        if engineer is not None:
+            df = engineer.transform(df)
+        return df[features]
+    except KeyError as e:
+        logger.error('Input chunk is missing a required column: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Error occured during chunk preparation: %s', e)
+        raise
+
+
+# scoring one chunk with a single vectorized model call
+def score_chunk(model, chunk: pd.DataFrame, preprocessor, features: list, engineer=None,
+                explain: bool = False, top_k: int = None, threshold: float = None) -> pd.DataFrame:
+    """
+    Return predicted class and survival probability for every row of the chunk,
+    with explain also the per-feature logit contributions (all or the top_k per row).
+    With a threshold a row is predicted to survive if its probability is >= threshold.
+    """
+    X = prepare_chunk(chunk, preprocessor, features, engineer)
+    proba = model.predict_proba(X)
+    survived_proba = proba[:, list(model.classes_).index(1)]
+    # labels come from the same probabilities, so the model runs once per chunk
+    if threshold is None:
+        predictions = model.classes_[proba.argmax(axis=1)]
+    else:
+        predictions = np.where(survived_proba >= threshold, 1, 0)
+    result = pd.DataFrame(index=chunk.index)
+    if 'PassengerId' in chunk.columns:
+        result['PassengerId'] = chunk['PassengerId']
+    result['Survived'] = predictions
+    result['Survived_proba'] = survived_proba
+    if explain:
+        result = pd.concat([result, explain_chunk(model, X, top_k)], axis=1)
+    return result
+
+
+# streaming input file through the model and writing results as they come
+def predict_file(model, input_path: str, output_path: str, preprocessor, chunk_size: int, engineer=None,
+                 explain: bool = False, top_k: int = None, threshold: float = None) -> int:
+    """Score input_path (CSV/Parquet) chunk by chunk and append the predictions (and explanations) to output_path."""
+    try:
+        features = list(model.feature_names_in_)
+        with FrameWriter(output_path) as writer:
+            for i, chunk in enumerate(iter_frames(input_path, chunk_size)):
+                result = score_chunk(model, chunk, preprocessor, features, engineer, explain, top_k, threshold)
+                writer.write(result)
+                logger.debug('Scored chunk %d (%d rows)', i, len(result))
+        logger.debug('Predictions for %d rows saved to %s', writer.rows_written, output_path)
+        return writer.rows_written
+    except Exception as e:
+        logger.error('Error occured during batch prediction: %s', e)
+        raise
+
+
+def main():
+    """Load the model once, then score an input CSV in fixed-size chunks"""
+    configure_logging('predict')
+    try:
+        all_params = load_params('params.yaml')
+        params = all_params['predict']
+
+        parser = argparse.ArgumentParser(description='Batch survival prediction')
+        parser.add_argument('--input', default=params['input_path'], help='CSV/Parquet file with passengers to score')
+        parser.add_argument('--output', default=params['output_path'], help='CSV/Parquet file to write predictions to')
+        parser.add_argument('--chunk-size', type=int, default=params['chunk_size'], help='rows per chunk')
+        parser.add_argument('--explain', action='store_true', default=params['explain'],
+                            help='add per-feature contributions to the logit (linear models)')
+        parser.add_argument('--top-k', type=int, default=params['top_k'],
+                            help='with --explain, only the k largest contributions per row')
+        args = parser.parse_args()
+
+        registry_params = all_params['model_registry']
+        if registry_params['enabled']:
+            # the current registry version, model and preprocessing steps from the same training run
+            bundle = load_bundle(registry_params['path'],
+                                 wrap_model=lambda model: cached_model(model, all_params['prediction_cache']))
+            model, preprocessor, engineer = bundle.model, bundle.preprocessor, bundle.engineer
+            threshold = bundle.threshold
+            logger.debug('Scoring with model version %s', bundle.version)
+        else:
+            model = cached_model(load_model('./models/model.pkl'), all_params['prediction_cache'], './models/model.pkl')
+            preprocessor = load_preprocessor('./models/preprocessor.pkl')
+            engineer = load_preprocessor('./models/feature_engineer.pkl')
+            threshold = load_threshold('./models/threshold.json', file_sha256('./models/model.pkl'))
+
+        predict_file(model, args.input, args.output, preprocessor, args.chunk_size, engineer,
+                     args.explain, args.top_k, threshold)
+        if isinstance(model, PredictionCache):
+            logger.debug('Prediction cache: %s', model.stats())
+        logger.debug('Batch prediction operation completed.')
+    except Exception as e:
+        logger.error('Failed to complete batch prediction: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
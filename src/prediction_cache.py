@@ -0,0 +1,157 @@
+import pandas as pd
+import numpy as np
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# eviction policies: 'lru' drops the least recently used entry, 'fifo' the oldest one
+POLICIES = ('lru', 'fifo')
+
+
+def file_signature(file_path: str) -> tuple:
+    """(mtime, size) of a file; a rewritten model.pkl changes it."""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def canonical_rows(X) -> np.ndarray:
+    """
+    Feature rows as one contiguous float64 matrix, so equal feature vectors have equal
+    bytes whatever their column dtypes: bool/int columns become floats, -0.0 becomes 0.0
+    and every NaN the same NaN.
+    """
+    values = X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else np.array(X, dtype=np.float64)
+    values = values + 0.0
+    values[np.isnan(values)] = np.nan
+    return np.ascontiguousarray(values)
+
+
+def group_rows(values: np.ndarray) -> tuple:
+    """
+    (index of the first occurrence of every distinct row, group of every row).
+    Rows are grouped by a vectorized 64-bit hash; the groups are only used if every
+    row equals its group's first row, a hash collision falls back to an exact sort.
+    """
+    # multiply-add of the raw float64 bits with fixed odd multipliers, wrapping at 2**64
+    multipliers = np.random.default_rng(0).integers(1, 2 ** 63, values.shape[1], dtype=np.uint64) | np.uint64(1)
+    hashes = (values.view(np.uint64) * multipliers).sum(axis=1, dtype=np.uint64)
+    groups, _ = pd.factorize(hashes)
+    _, first = np.unique(groups, return_index=True)
+    if np.array_equal(values[first][groups], values, equal_nan=True):
+        return first, groups
+    keys = values.view(np.dtype((np.void, values.shape[1] * values.itemsize))).ravel()
+    _, first, groups = np.unique(keys, return_index=True, return_inverse=True)
+    return first, groups.ravel()
+
+
+class PredictionCache:
+    """
+    Bounded cache in front of a fitted model, keyed on the preprocessed feature vector.
+    predict() and predict_proba() look every distinct row of a batch up once; only the
+    rows never seen before reach the estimator, in one call. Other attributes
+    (feature_names_in_, classes_, ...) are the model's, so the cache can stand in for it.
+    With a model_path the model is reloaded and the cache cleared as soon as the file changes;
+    only for short runs that load nothing else with the model (serve swaps whole registry bundles).
+    hits counts rows whose entry was cached before the lookup, misses every other row.
+    """
+
+    def __init__(self, model=None, model_path: str = None, max_size: int = 100000, policy: str = 'lru'):
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown cache policy: {policy} (expected one of {POLICIES})')
+        if model is None and model_path is None:
+            raise ValueError('PredictionCache needs a model or a model_path')
+        self.model_path = model_path
+        self.max_size = max_size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = file_signature(model_path) if model_path else None
+        self.model = model if model is not None else self._load_model()
+
+    def __getattr__(self, name: str):
+        # only called for attributes the cache itself does not have
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _load_model(self):
+        with open(self.model_path, 'rb') as file:
+            return pickle.load(file)
+
+    def _check_model(self) -> None:
+        """Reload the model and drop every entry if model_path changed on disk."""
+        if self.model_path is None:
+            return
+        signature = file_signature(self.model_path)
+        if signature != self._signature:
+            self.model = self._load_model()
+            self._signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def predict(self, X) -> np.ndarray:
+        return self._cached('predict', X)
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._cached('predict_proba', X)
+
+    def _cached(self, method: str, X) -> np.ndarray:
+        with self._lock:
+            self._check_model()
+            if len(X) == 0:
+                return getattr(self.model, method)(X)
+            values = canonical_rows(X)
+            first, groups = group_rows(values)
+            # one namespace per method, so labels and probabilities of a row are separate entries
+            entry_keys = [method.encode() + row.tobytes() for row in values[first]]
+
+            results = [None] * len(entry_keys)
+            missing = []
+            for i, entry_key in enumerate(entry_keys):
+                value = self._entries.get(entry_key)
+                if value is None:
+                    missing.append(i)
+                    continue
+                results[i] = value
+                if self.policy == 'lru':
+                    self._entries.move_to_end(entry_key)
+            # repeats of a new row within the batch are misses too, nothing was cached for them
+            missed_rows = int(np.bincount(groups, minlength=len(entry_keys))[missing].sum())
+
+            if missing:
+                rows = X.iloc[first[missing]] if isinstance(X, pd.DataFrame) else np.asarray(X)[first[missing]]
+                for i, value in zip(missing, getattr(self.model, method)(rows)):
+                    results[i] = value
+                    self._entries[entry_keys[i]] = value
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            self.misses += missed_rows
+            self.hits += len(values) - missed_rows
+            return np.asarray(results)[groups]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'policy': self.policy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+def cached_model(model, params: dict, model_path: str = None):
+    """The model behind a PredictionCache if the prediction_cache params enable one, else the model itself."""
+    if not params['enabled']:
+        return model
+    return PredictionCache(model, model_path=model_path, max_size=params['max_size'], policy=params['policy'])
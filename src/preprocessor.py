@@ -0,0 +1,83 @@
+import pandas as pd
+import numpy as np
+from sketches import merge_profiles, profile_frame
+
+
+class Preprocessor:
+    """
+    Learns the preprocessing values once (on train) and applies them to any frame:
+    Age: fill with the train median
+    Embarked: fill with the train mode, one-hot encoding over the train ports
+    (drop first to avoid multicollinearity)
+    Sex: male: 0, female: 1
+    The lookup tables are built in fit(), so transform() is a handful of
+    array operations with no reductions over the incoming frame.
+    The statistics come from mergeable sketches (see sketches.py), so they can be
+    learned chunk by chunk with fit_chunks() or from profiles merged elsewhere.
+    Kept in its own module so the pickled object loads from any stage.
+    """
+
+    sex_categories = ['male', 'female']
+
+    def __init__(self):
+        self.age_median = None
+        self.embarked_mode = None
+        self.embarked_categories = None
+
+    def fit(self, dataFrame: pd.DataFrame) -> 'Preprocessor':
+        """Learn the imputation values and encodings from a (training) frame."""
+        return self.fit_profile(profile_frame(dataFrame[['Age', 'Embarked']]))
+
+    def fit_chunks(self, chunks) -> 'Preprocessor':
+        """Learn from an iterable of (training) chunks, one chunk in memory at a time."""
+        return self.fit_profile(merge_profiles(profile_frame(chunk[['Age', 'Embarked']]) for chunk in chunks))
+
+    def fit_profile(self, profile: dict) -> 'Preprocessor':
+        """Learn from column sketches: Age median from the quantile sketch, Embarked from the counts."""
+        self.age_median = profile['Age'].quantile(0.5)
+        self.embarked_mode = profile['Embarked'].mode()
+        self.embarked_categories = profile['Embarked'].categories()
+        self._build_lookups()
+        return self
+
+    def _build_lookups(self) -> None:
+        """Precompute the hash lookups used by transform()."""
+        self._sex_index = pd.Index(self.sex_categories)
+        self._embarked_index = pd.Index(self.embarked_categories)
+        self._embarked_fill_code = self.embarked_categories.index(self.embarked_mode)
+
+    @property
+    def embarked_columns(self) -> list:
+        """One-hot column names produced for Embarked (first port dropped)."""
+        return [f'Embarked_{port}' for port in self.embarked_categories[1:]]
+
+    def transform(self, dataFrame: pd.DataFrame) -> pd.DataFrame:
+        """Apply the fitted values to a frame; unseen ports are treated like missing ones."""
+        if self.embarked_categories is None:
+            raise ValueError('Preprocessor must be fitted before transform')
+        df = dataFrame.drop(columns=['Embarked'])
+
+        # Age: filling missing values with the train median
+        age = dataFrame['Age'].to_numpy(dtype=np.float32, copy=True)
+        age[np.isnan(age)] = self.age_median
+        df['Age'] = age
+
+        # Sex: Encoding catagorical data (unknown values stay missing)
+        sex_codes = self._sex_index.get_indexer(dataFrame['Sex'])
+        df['Sex'] = np.where(sex_codes >= 0, sex_codes, np.nan) if (sex_codes < 0).any() else sex_codes.astype(np.int8)
+
+        # Embarked: fill with the train mode, then one-hot encode against the train ports
+        embarked_codes = self._embarked_index.get_indexer(dataFrame['Embarked'])
+        embarked_codes[embarked_codes < 0] = self._embarked_fill_code
+        for code, column in enumerate(self.embarked_columns, start=1):
+            df[column] = embarked_codes == code
+        return df
+
+    def __getstate__(self) -> dict:
+        # lookups are rebuilt on load, only the learned values are pickled
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_')}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if self.embarked_categories is not None:
+            self._build_lookups()
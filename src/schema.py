@@ -0,0 +1,158 @@
+import pandas as pd
+import numpy as np
+
+# raw passenger columns and the compact dtype every stage keeps them in;
+# columns not listed here are dropped when the data is read
+RAW_SCHEMA = {
+    'PassengerId': 'int32',
+    'Survived': 'int8',
+    'Pclass': 'int8',
+    'Name': 'category',
+    'Sex': pd.CategoricalDtype(['male', 'female']),
+    'Age': 'float32',
+    'SibSp': 'int8',
+    'Parch': 'int8',
+    'Ticket': 'category',
+    'Fare': 'float32',
+    'Cabin': 'category',
+    'Embarked': 'category',
+}
+
+# columns that may be missing: Age/Embarked are imputed, Cabin is usually unknown
+NULLABLE_COLUMNS = {'Age', 'Embarked', 'Cabin', 'Ticket', 'Fare'}
+
+# dtypes of the columns the preprocessor and the feature engineer produce
+PROCESSED_DTYPES = {
+    'Sex': 'int8',
+    # SibSp + Parch + 1 of two int8 counts needs int16; ticket groups grow with the data
+    'FamilySize': 'int16',
+    'IsAlone': 'bool',
+    'Deck': 'int8',
+    'CabinCount': 'int8',
+    'TicketGroupSize': 'int32',
+}
+PROCESSED_PREFIXES = {
+    'Embarked_': 'bool',
+    'Title_': 'bool',
+}
+
+
+class SchemaError(ValueError):
+    """A frame does not match the declared schema."""
+
+
+def processed_schema(columns) -> dict:
+    """Schema of a preprocessed/engineered frame with the given columns."""
+    schema = {}
+    for column in columns:
+        if column in PROCESSED_DTYPES:
+            schema[column] = PROCESSED_DTYPES[column]
+        elif column in RAW_SCHEMA:
+            schema[column] = RAW_SCHEMA[column]
+        else:
+            prefix = next((p for p in PROCESSED_PREFIXES if column.startswith(p)), None)
+            if prefix is None:
+                raise SchemaError(f'Column "{column}" is not declared in the schema')
+            schema[column] = PROCESSED_PREFIXES[prefix]
+    return schema
+
+
+def csv_dtypes(schema: dict) -> dict:
+    """
+    dtype argument for pd.read_csv: strings are parsed straight into categories and
+    floats into float32. Integers are parsed at full width and checked by
+    enforce_schema(), read_csv would silently wrap values that overflow int8.
+    Declared category sets are checked there too (read_csv turns unknown values into NaN).
+    """
+    dtypes = {}
+    for column, dtype in schema.items():
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = 'category'
+        elif not pd.api.types.is_integer_dtype(dtype):
+            dtypes[column] = dtype
+    return dtypes
+
+
+def arrow_types(schema: dict) -> dict:
+    """
+    Column types for pyarrow's CSV reader: strings are dictionary encoded while
+    parsing (they arrive as categories), floats are parsed as float32. Integers
+    are left to enforce_schema() for the same reason as in csv_dtypes().
+    """
+    import pyarrow as pa
+    types = {}
+    for column, dtype in schema.items():
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if isinstance(dtype, pd.CategoricalDtype):
+            types[column] = pa.dictionary(pa.int32(), pa.string())
+        elif pd.api.types.is_float_dtype(dtype):
+            types[column] = pa.from_numpy_dtype(dtype)
+    return types
+
+
+def _cast_column(series: pd.Series, dtype) -> pd.Series:
+    """Cast one column, raising SchemaError instead of producing wrong values."""
+    column = series.name
+    dtype = pd.api.types.pandas_dtype(dtype)
+    if isinstance(series.dtype, pd.CategoricalDtype) and series.cat.categories.dtype != object:
+        # e.g. all-numeric tickets parsed into integer categories: keep strings like every other reader
+        series = series.cat.rename_categories(series.cat.categories.astype(str))
+    if series.dtype == dtype:
+        return series
+    if isinstance(dtype, pd.CategoricalDtype):
+        if dtype.categories is not None:
+            unknown = set(series.dropna().unique()) - set(dtype.categories)
+            if unknown:
+                raise SchemaError(f'{column}: unexpected values {sorted(map(str, unknown))[:5]}')
+        return series.astype(dtype)
+    if pd.api.types.is_bool_dtype(dtype):
+        if series.isna().any():
+            raise SchemaError(f'{column}: missing values in a boolean column')
+        return series.astype(dtype)
+    try:
+        values = pd.to_numeric(series, errors='raise')
+    except (ValueError, TypeError) as e:
+        raise SchemaError(f'{column}: non-numeric values ({e})') from None
+    if pd.api.types.is_integer_dtype(dtype):
+        if values.isna().any():
+            raise SchemaError(f'{column}: {int(values.isna().sum())} missing values in an integer column')
+        if len(values) and not (values == np.round(values)).all():
+            raise SchemaError(f'{column}: fractional values in an integer column')
+        limits = np.iinfo(dtype)
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise SchemaError(f'{column}: values outside the {dtype} range [{limits.min}, {limits.max}]')
+    return values.astype(dtype)
+
+
+def drop_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove categories no row uses any more (e.g. after a train/test split), so a
+    split does not carry the dictionary of the whole dataset. Declared category
+    sets (like Sex) are kept as they are.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if RAW_SCHEMA.get(column) == 'category' and isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def enforce_schema(df: pd.DataFrame, schema: dict = None, required: list = None) -> pd.DataFrame:
+    """
+    Return df with exactly the schema columns present in it, each cast to its
+    declared dtype. Undeclared columns are dropped; a missing required column
+    (default: all of the schema), a null in a non-nullable column or a value that
+    does not fit the dtype raises SchemaError.
+    """
+    schema = RAW_SCHEMA if schema is None else schema
+    required = list(schema) if required is None else required
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise SchemaError(f'Missing required columns {missing}')
+    columns = [column for column in schema if column in df.columns]
+    for column in columns:
+        if column not in NULLABLE_COLUMNS and df[column].isna().any():
+            raise SchemaError(f'{column}: {int(df[column].isna().sum())} missing values')
+    return pd.DataFrame({column: _cast_column(df[column], schema[column]) for column in columns},
+                        index=df.index)
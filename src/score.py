@@ -0,0 +1,191 @@
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import itertools
+
+from model_files import file_sha256, load_threshold
+
+# Fast-start scoring for short-lived jobs. Only the standard library is imported at
+# module level: numpy comes in with the exported model (models/model.bin), pandas and
+# sklearn only when a pickled model is scored, pyarrow only for Parquet files.
+# Nothing is written until there is output; the log file only with --log.
+
+# module logger; log_config (and yaml) are only imported by main() with --log,
+# without it warnings and errors still reach stderr through logging's last resort handler
+logger = logging.getLogger('score')
+logger.setLevel(logging.DEBUG)
+
+DEFAULT_MODEL = './models/model.bin'
+DEFAULT_CHUNK_SIZE = 100000
+# raw columns parsed as numbers in the CSV fast path, the rest stay strings
+NUMERIC_FIELDS = ('Pclass', 'Age', 'SibSp', 'Parch', 'Fare')
+OUTPUT_FIELDS = ('PassengerId', 'Survived', 'Survived_proba')
+
+
+def _csv_columns(header: list, rows: list) -> dict:
+    """Column lists of a block of CSV rows; numeric fields as floats (empty = NaN)."""
+    columns = {}
+    for name, values in zip(header, zip(*rows)):
+        if name in NUMERIC_FIELDS:
+            columns[name] = [float(value) if value else float('nan') for value in values]
+        else:
+            columns[name] = values
+    return columns
+
+
+# reading raw passengers as column blocks without pandas
+def read_columns(input_path: str, chunk_size: int):
+    """Yield {field: values} for every chunk_size rows of a CSV (csv module) or Parquet (pyarrow) file."""
+    if input_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size):
+            yield {name: column.to_numpy(zero_copy_only=False)
+                   for name, column in zip(batch.schema.names, batch.columns)}
+        return
+    with open(input_path, 'r', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            yield _csv_columns(header, rows)
+
+
+# writing (ids, labels, probabilities) blocks as they come
+def write_results(output_path: str, results) -> int:
+    """Write the result blocks to a CSV file, stdout ('-') or a Parquet file; returns the rows written."""
+    rows_written = 0
+    if output_path != '-' and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    if output_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for ids, labels, proba in results:
+                table = pa.table(dict(zip(OUTPUT_FIELDS, (ids, labels, proba))))
+                writer = writer or pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                rows_written += len(labels)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows_written
+    file = sys.stdout if output_path == '-' else open(output_path, 'w', newline='')
+    try:
+        writer = csv.writer(file)
+        writer.writerow(OUTPUT_FIELDS)
+        for ids, labels, proba in results:
+            writer.writerows(zip(ids, labels.tolist(), proba.tolist()))
+            rows_written += len(labels)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return rows_written
+
+
+def _first_timed(results, timings: dict, start: float):
+    """Pass the result blocks through, recording when the first one was ready."""
+    for i, result in enumerate(results):
+        if i == 0:
+            timings['first_prediction_s'] = time.perf_counter() - start
+        yield result
+
+
+# scoring with the exported coefficients: numpy only
+def score_exported(model_path: str, input_path: str, output_path: str, chunk_size: int,
+                   threshold_path: str, timings: dict) -> int:
+    """Score with LinearScorer (models/model.bin) and the threshold tuned for the model.pkl it was exported from."""
+    start = time.perf_counter()
+    from linear_scorer import LinearScorer
+    timings['import_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scorer = LinearScorer.load(model_path)
+    threshold = load_threshold(threshold_path, scorer.source_sha256) if scorer.source_sha256 else None
+    timings['load_s'] = time.perf_counter() - start
+
+    def results():
+        first_row = 0
+        for columns in read_columns(input_path, chunk_size):
+            labels, proba = scorer.score(columns, threshold)
+            # row numbers stand in for a missing PassengerId
+            ids = columns.get('PassengerId', range(first_row, first_row + len(labels)))
+            first_row += len(labels)
+            yield ids, labels, proba
+
+    return write_results(output_path, _first_timed(results(), timings, time.perf_counter()))
+
+
+# scoring with the pickled sklearn model and preprocessing steps
+def score_pickled(model_path: str, input_path: str, output_path: str, chunk_size: int,
+                  threshold_path: str, timings: dict) -> int:
+    """Score with model.pkl and the preprocessor.pkl / feature_engineer.pkl next to it, like predict.py."""
+    start = time.perf_counter()
+    from data_io import FrameWriter, iter_frames
+    from predict import load_model, load_preprocessor, score_chunk
+    timings['import_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model_dir = os.path.dirname(model_path)
+    model = load_model(model_path)
+    preprocessor = load_preprocessor(os.path.join(model_dir, 'preprocessor.pkl'))
+    engineer = load_preprocessor(os.path.join(model_dir, 'feature_engineer.pkl'))
+    threshold = load_threshold(threshold_path, file_sha256(model_path))
+    features = list(model.feature_names_in_)
+    timings['load_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with FrameWriter(output_path) as writer:
+        for i, chunk in enumerate(iter_frames(input_path, chunk_size)):
+            writer.write(score_chunk(model, chunk, preprocessor, features, engineer, threshold=threshold))
+            if i == 0:
+                timings['first_prediction_s'] = time.perf_counter() - start
+    return writer.rows_written
+
+
+def main():
+    """Score a file of raw passengers with as little start-up work as possible"""
+    start = time.perf_counter()
+    parser = argparse.ArgumentParser(description='Fast-start survival scoring')
+    parser.add_argument('input', help='CSV/Parquet file with passengers to score')
+    parser.add_argument('--output', default='-', help='CSV/Parquet file for the predictions, - for stdout')
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help='exported model.bin (numpy only) or model.pkl (pandas + sklearn)')
+    parser.add_argument('--threshold', default=None,
+                        help='threshold.json from model_evaluation (default: next to the model)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='rows per chunk')
+    parser.add_argument('--log', action='store_true', help='also log to logs/score.log (reads params.yaml)')
+    parser.add_argument('--timings', default=None, help='write import/load/first prediction times to this JSON file')
+    args = parser.parse_args()
+
+    if args.log:
+        from log_config import configure_logging
+        configure_logging('score')
+    try:
+        threshold_path = args.threshold or os.path.join(os.path.dirname(args.model), 'threshold.json')
+        if args.model.endswith('.pkl'):
+            if args.output == '-':
+                raise ValueError('Scoring a pickled model needs an --output file')
+            score = score_pickled
+        else:
+            score = score_exported
+        timings = {}
+        rows = score(args.model, args.input, args.output, args.chunk_size, threshold_path, timings)
+        timings['total_s'] = time.perf_counter() - start
+        logger.debug('Scored %d rows with %s in %.3fs', rows, args.model, timings['total_s'])
+
+        if args.timings:
+            with open(args.timings, 'w') as file:
+                json.dump({'model': args.model, 'rows': rows, **timings}, file, indent=4)
+    except Exception as e:
+        logger.error('Scoring failed: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+import pandas as pd
+import json
+import time
+import asyncio
+
+from predict import load_params, load_model, load_preprocessor, score_chunk
+from model_files import file_sha256, load_threshold
+from model_registry import HotReloader
+from prediction_cache import PredictionCache, cached_model
+from feature_engineer import SOURCE_FIELDS
+from schema import RAW_SCHEMA, enforce_schema
+from log_config import configure_logging, get_logger
+
+# module logger, handlers are set up by configure_logging() in main()
+logger = get_logger('serve')
+
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+MAX_BODY_BYTES = 10 * 1024 * 1024
+# fields the preprocessor imputes or the feature engineer treats as unknown, so requests may leave them out
+IMPUTED_FIELDS = {'Age', 'Embarked', 'Cabin', 'Ticket'}
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests into micro-batches.
+    A batch is closed when it holds max_batch_size rows or max_wait_ms after its
+    first request arrived, then scored with a single score_fn(DataFrame) call in a
+    worker thread; every caller gets back the rows it submitted. If the batch call
+    fails, its requests are scored one by one, so only the failing request gets the error.
+    """
+
+    def __init__(self, score_fn, input_fields: list, max_batch_size: int, max_wait_ms: float):
+        self.score_fn = score_fn
+        self.input_fields = input_fields
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_scored = 0
+        self.rows_scored = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, records: list) -> list:
+        """Queue the records of one request and wait for their predictions."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for the first request, then fill the batch until it is full or the wait is over."""
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    async def _score(self, records: list) -> list:
+        """Score records with one score_fn call in a worker thread; returns one dict per record."""
+        frame = pd.DataFrame.from_records(records)
+        # optional fields left out by every request still need a column
+        missing = [field for field in self.input_fields if field not in frame.columns]
+        if missing:
+            frame = frame.reindex(columns=list(frame.columns) + missing)
+        result = await asyncio.get_running_loop().run_in_executor(None, self.score_fn, frame)
+        return result.to_dict(orient='records')
+
+    async def _score_each(self, batch: list) -> None:
+        """Fallback after a failed batch: every request on its own, errors stay with their request."""
+        for request_records, future in batch:
+            try:
+                rows = await self._score(request_records)
+            except Exception as e:
+                logger.error('Scoring a request of %d rows failed: %s', len(request_records), e)
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.rows_scored += len(rows)
+            if not future.done():
+                future.set_result(rows)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            records = [record for request_records, _ in batch for record in request_records]
+            try:
+                rows = await self._score(records)
+            except Exception as e:
+                logger.error('Scoring a batch of %d rows failed: %s', len(records), e)
+                if len(batch) > 1:
+                    await self._score_each(batch)
+                else:
+                    future = batch[0][1]
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches_scored += 1
+            self.rows_scored += len(rows)
+            logger.debug('Scored batch of %d requests / %d rows', len(batch), len(rows))
+            offset = 0
+            for request_records, future in batch:
+                if not future.done():
+                    future.set_result(rows[offset:offset + len(request_records)])
+                offset += len(request_records)
+
+
+def _json_response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+    return head.encode() + body
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Read one HTTP/1.1 request; returns (method, path, headers, body) or None on EOF."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY_BYTES:
+        raise PayloadTooLarge(f'request body over {MAX_BODY_BYTES} bytes')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+def input_fields_of(features: list) -> list:
+    """Raw passenger fields needed to build the model features."""
+    fields = []
+    for feature in features:
+        if feature.startswith('Embarked_'):
+            sources = ['Embarked']
+        else:
+            sources = SOURCE_FIELDS.get(feature, [feature])
+        for field in sources:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def _passenger_records(payload, required_fields: list, input_fields: list) -> list:
+    """
+    Accept one passenger object, a list of them or {"passengers": [...]}. The input
+    fields are checked and coerced with the raw schema (numbers, integer ranges,
+    known Sex values, nulls only where allowed), so a bad value is this request's
+    400 and never reaches a micro-batch shared with other requests.
+    """
+    if isinstance(payload, dict) and 'passengers' in payload:
+        payload = payload['passengers']
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list) or not payload or not all(isinstance(p, dict) for p in payload):
+        raise ValueError('expected a passenger object or a non-empty list of them')
+    for i, record in enumerate(payload):
+        missing = [field for field in required_fields if field not in record]
+        if missing:
+            raise ValueError(f'passenger {i} is missing fields {missing}')
+    frame = pd.DataFrame.from_records(payload)
+    schema = {field: RAW_SCHEMA[field] for field in input_fields if field in RAW_SCHEMA and field in frame.columns}
+    # SchemaError is a ValueError: answered with 400
+    validated = enforce_schema(frame, schema, required=[])
+    for field in validated.columns:
+        frame[field] = validated[field]
+    return frame.to_dict(orient='records')
+
+
+class PredictionServer:
+    """HTTP/JSON front end: POST /predict scores passengers, GET /health reports status."""
+
+    def __init__(self, batcher: MicroBatcher, model_version: str, cache: PredictionCache = None,
+                 reloader: HotReloader = None):
+        self.batcher = batcher
+        self.model_version = model_version
+        self.cache = cache
+        self.reloader = reloader
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError) as e:
+                    status = 413 if isinstance(e, PayloadTooLarge) else 400
+                    writer.write(_json_response(status, {'error': str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self.route(method, path, body)
+                writer.write(_json_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple:
+        if path == '/health':
+            model_version, cache = self.model_version, self.cache
+            if self.reloader is not None:
+                bundle = self.reloader.current()
+                model_version = bundle.version
+                cache = bundle.model if isinstance(bundle.model, PredictionCache) else None
+            status = {'status': 'ok', 'model': model_version,
+                      'batches_scored': self.batcher.batches_scored,
+                      'rows_scored': self.batcher.rows_scored}
+            if self.reloader is not None:
+                status['reloads'] = self.reloader.reloads
+            if cache is not None:
+                status['cache'] = cache.stats()
+            return 200, status
+        if path != '/predict':
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+        try:
+            required_fields = [f for f in self.batcher.input_fields if f not in IMPUTED_FIELDS]
+            records = _passenger_records(json.loads(body), required_fields, self.batcher.input_fields)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        try:
+            predictions = await self.batcher.submit(records)
+        except Exception as e:
+            return 500, {'error': str(e)}
+        return 200, {'predictions': predictions}
+
+
+def score_current(reloader: HotReloader, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score a batch with the bundle current when it starts (model, preprocessing and
+    threshold), a swap during the batch does not affect it.
+    """
+    bundle = reloader.current()
+    return score_chunk(bundle.model, frame, bundle.preprocessor, list(bundle.model.feature_names_in_), bundle.engineer,
+                       threshold=bundle.threshold)
+
+
+async def serve(params: dict, model, preprocessor, model_version: str, engineer=None,
+                reloader: HotReloader = None, threshold: float = None) -> None:
+    """
+    Start the batcher and the HTTP server and run until cancelled.
+    With a reloader every batch is scored by the reloader's current version instead.
+    """
+    features = list(model.feature_names_in_)
+    if reloader is not None:
+        score_fn = lambda frame: score_current(reloader, frame)
+    else:
+        score_fn = lambda frame: score_chunk(model, frame, preprocessor, features, engineer, threshold=threshold)
+    batcher = MicroBatcher(score_fn, input_fields=input_fields_of(features),
+                           max_batch_size=params['max_batch_size'], max_wait_ms=params['max_wait_ms'])
+    batcher.start()
+    app = PredictionServer(batcher, model_version, cache=model if isinstance(model, PredictionCache) else None,
+                           reloader=reloader)
+    server = await asyncio.start_server(app.handle, params['host'], params['port'])
+    logger.info('Serving predictions on http://%s:%s (max batch %d rows, max wait %s ms)',
+                params['host'], params['port'], params['max_batch_size'], params['max_wait_ms'])
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    """Load the model and preprocessor once, then serve predictions over HTTP"""
+    configure_logging('serve')
+    try:
+        all_params = load_params('params.yaml')
+        params = all_params['serve']
+        registry_params = all_params['model_registry']
+        if registry_params['enabled']:
+            # the registry's current version, swapped in the background when a new one is published
+            reloader = HotReloader(registry_params['path'], registry_params['poll_interval_s'],
+                                   wrap_model=lambda model: cached_model(model, all_params['prediction_cache'])).start()
+            bundle = reloader.current()
+            asyncio.run(serve(params, bundle.model, bundle.preprocessor, model_version=bundle.version,
+                              engineer=bundle.engineer, reloader=reloader))
+        else:
+            # loaded once: no model_path for the cache, a reload of model.pkl alone would score with the
+            # preprocessing steps and threshold of the old model; swapping a retrained model needs the registry
+            model = cached_model(load_model('./models/model.pkl'), all_params['prediction_cache'])
+            preprocessor = load_preprocessor('./models/preprocessor.pkl')
+            engineer = load_preprocessor('./models/feature_engineer.pkl')
+            threshold = load_threshold('./models/threshold.json', file_sha256('./models/model.pkl'))
+            asyncio.run(serve(params, model, preprocessor, model_version='models/model.pkl', engineer=engineer,
+                              threshold=threshold))
+    except KeyboardInterrupt:
+        logger.info('Prediction server stopped.')
+    except Exception as e:
+        logger.error('Prediction server failed: %s', e)
+        raise
+
+if __name__ == '__main__':
+    main()
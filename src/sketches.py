@@ -0,0 +1,204 @@
+import pandas as pd
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile summary of a numeric column (a t-digest style centroid list).
+    Values are kept as (value, count) pairs, which is exact as long as the column has
+    at most max_centroids distinct values; beyond that neighbouring centroids are merged,
+    finely at the tails and coarsely around the median. Also counts nulls, min and max.
+    """
+
+    def __init__(self, max_centroids: int = 200):
+        self.max_centroids = max_centroids
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.null_count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.exact = True
+
+    def update(self, values) -> 'QuantileSketch':
+        """Add a batch of values (NaN counts as null)."""
+        values = np.asarray(values, dtype=np.float64)
+        nulls = np.isnan(values)
+        values = values[~nulls]
+        self.null_count += int(nulls.sum())
+        if values.size:
+            self.count += values.size
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            unique, counts = np.unique(values, return_counts=True)
+            self._add(unique, counts.astype(np.float64))
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """Fold another sketch of the same column into this one."""
+        self.count += other.count
+        self.null_count += other.null_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._add(other.means, other.weights)
+        return self
+
+    def _add(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        # equal values share one centroid, so small-cardinality columns stay exact
+        self.means, inverse = np.unique(means, return_inverse=True)
+        self.weights = np.bincount(inverse.ravel(), weights=weights)
+        if self.means.size > self.max_centroids:
+            self._compress()
+
+    def _compress(self) -> None:
+        """Merge neighbouring centroids into at most max_centroids buckets (arcsine scale)."""
+        cumulative = np.cumsum(self.weights)
+        q_mid = (cumulative - self.weights / 2) / cumulative[-1]
+        scale = np.arcsin(2 * q_mid - 1) / np.pi + 0.5
+        buckets = np.minimum((scale * self.max_centroids).astype(np.int64), self.max_centroids - 1)
+        # buckets are sorted, so renumber the used ones 0..n-1
+        _, buckets = np.unique(buckets, return_inverse=True)
+        weights = np.bincount(buckets, weights=self.weights)
+        self.means = np.bincount(buckets, weights=self.means * self.weights) / weights
+        self.weights = weights
+        self.exact = False
+
+    def quantile(self, q: float) -> float:
+        """
+        q-quantile. While exact this is pandas' definition (linear interpolation between
+        order statistics); once compressed it interpolates between centroid centres.
+        """
+        if not self.count:
+            return float('nan')
+        cumulative = np.cumsum(self.weights)
+        if self.exact:
+            position = (cumulative[-1] - 1) * q
+            lower, upper = np.floor(position), np.ceil(position)
+            # the order statistic k is the centroid whose cumulative count first exceeds k
+            values = self.means[np.searchsorted(cumulative, [lower, upper], side='right')]
+            return float(values[0] + (values[1] - values[0]) * (position - lower))
+        centres = cumulative - self.weights / 2
+        return float(np.interp(q * cumulative[-1], np.concatenate([[0], centres, [cumulative[-1]]]),
+                               np.concatenate([[self.min], self.means, [self.max]])))
+
+    def histogram(self, bins: int = 10) -> dict:
+        """Counts over `bins` equal-width bins between min and max."""
+        if not self.count:
+            return {'edges': [], 'counts': []}
+        counts, edges = np.histogram(self.means, bins=bins, range=(self.min, self.max), weights=self.weights)
+        return {'edges': edges.tolist(), 'counts': counts.round().astype(np.int64).tolist()}
+
+    def summary(self) -> dict:
+        total = self.count + self.null_count
+        return {
+            'type': 'numeric',
+            'count': self.count,
+            'null_count': self.null_count,
+            'null_rate': self.null_count / total if total else 0.0,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'quantiles': {str(q): self.quantile(q) for q in (0.05, 0.25, 0.5, 0.75, 0.95)},
+            'histogram': self.histogram(),
+            'exact': self.exact,
+        }
+
+
+class FrequencySketch:
+    """
+    Mergeable value counts of a categorical column. Exact up to max_items distinct
+    values; beyond that it keeps the heavy hitters (Misra-Gries) with lower-bound
+    counts, so the mode stays right while rare values are dropped. Also counts nulls.
+    """
+
+    def __init__(self, max_items: int = 1000):
+        self.max_items = max_items
+        self.counts = pd.Series(dtype=np.int64)
+        self.count = 0
+        self.null_count = 0
+        self.exact = True
+
+    def update(self, values) -> 'FrequencySketch':
+        """Add a batch of values (NaN/None counts as null)."""
+        values = pd.Series(values)
+        nulls = int(values.isna().sum())
+        self.null_count += nulls
+        self.count += len(values) - nulls
+        counts = values.value_counts(dropna=True)
+        self._add(counts[counts > 0])
+        return self
+
+    def merge(self, other: 'FrequencySketch') -> 'FrequencySketch':
+        """Fold another sketch of the same column into this one."""
+        self.count += other.count
+        self.null_count += other.null_count
+        self.exact = self.exact and other.exact
+        self._add(other.counts)
+        return self
+
+    def _reduce(self, counts: pd.Series) -> pd.Series:
+        """Misra-Gries: subtract the (max_items + 1)-th largest count from everyone."""
+        if len(counts) <= self.max_items:
+            return counts
+        threshold = np.sort(counts.to_numpy())[-(self.max_items + 1)]
+        self.exact = False
+        return counts[counts > threshold] - threshold
+
+    def _add(self, counts: pd.Series) -> None:
+        # summaries stay mergeable when each side is reduced first, which keeps the alignment small
+        counts = self._reduce(counts)
+        counts.index = counts.index.astype(object)
+        self.counts = self._reduce(self.counts.add(counts, fill_value=0).astype(np.int64))
+
+    def mode(self):
+        """Most frequent value; ties go to the smallest value like pandas' mode()[0]."""
+        if self.counts.empty:
+            return None
+        top = self.counts[self.counts == self.counts.max()]
+        return sorted(top.index)[0]
+
+    def categories(self) -> list:
+        """Sorted distinct values seen (the heavy hitters once the sketch is not exact)."""
+        return sorted(self.counts.index)
+
+    def summary(self, top: int = 10) -> dict:
+        total = self.count + self.null_count
+        return {
+            'type': 'categorical',
+            'count': self.count,
+            'null_count': self.null_count,
+            'null_rate': self.null_count / total if total else 0.0,
+            'distinct': len(self.counts) if self.exact else None,
+            'top': {str(value): int(n) for value, n in self.counts.nlargest(top).items()},
+            'exact': self.exact,
+        }
+
+
+def profile_frame(df: pd.DataFrame, max_centroids: int = 200, max_items: int = 1000) -> dict:
+    """One sketch per column of a chunk: quantiles for numeric and frequencies for other columns."""
+    profile = {}
+    for column in df.columns:
+        if pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column]):
+            profile[column] = QuantileSketch(max_centroids).update(df[column].to_numpy(dtype=np.float64))
+        else:
+            profile[column] = FrequencySketch(max_items).update(df[column])
+    return profile
+
+
+def merge_profiles(profiles) -> dict:
+    """Merge per-chunk profiles (e.g. built in parallel) column by column."""
+    merged = {}
+    for profile in profiles:
+        for column, sketch in profile.items():
+            if column in merged:
+                merged[column].merge(sketch)
+            else:
+                merged[column] = sketch
+    return merged
+
+
+def quality_report(profile: dict) -> dict:
+    """Null rate, quantiles/histogram or top values of every profiled column."""
+    return {column: sketch.summary() for column, sketch in profile.items()}
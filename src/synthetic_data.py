@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+import os
+import argparse
+
+# value pools roughly following experiments/data/raw/data.csv
+TITLES = np.array(['Mr', 'Miss', 'Mrs', 'Master', 'Dr', 'Rev', 'Col'])
+MALE_TITLE_P = np.array([0.90, 0.0, 0.0, 0.07, 0.015, 0.01, 0.005])
+FEMALE_TITLE_P = np.array([0.0, 0.57, 0.42, 0.0, 0.01, 0.0, 0.0])
+SURNAMES = np.array(['Andersson', 'Sage', 'Johnson', 'Goodwin', 'Carter', 'Panula', 'Skoog', 'Rice',
+                     'Asplund', 'Brown', 'Smith', 'Williams', 'Kelly', 'Harris', 'Baxter', 'Allison'])
+GIVEN_NAMES = np.array(['John', 'William', 'Mary', 'Anna', 'Charles', 'Elizabeth', 'George', 'Margaret',
+                        'Thomas', 'Helen', 'James', 'Alice', 'Edward', 'Emily', 'Karl', 'Johan'])
+DECKS = np.array(list('ABCDEFG'))
+PORTS = np.array(['S', 'C', 'Q'])
+COLUMNS = ['PassengerId', 'Survived', 'Pclass', 'Name', 'Sex', 'Age', 'SibSp', 'Parch',
+           'Ticket', 'Fare', 'Cabin', 'Embarked']
+
+
+def generate_passengers(n_rows: int, seed: int, first_id: int = 1) -> pd.DataFrame:
+    """
+    Generate n_rows synthetic passengers with the Titanic CSV schema.
+    Every column is drawn with vectorized NumPy calls; survival follows a
+    logistic model of sex, class, age and fare so the data is learnable.
+    """
+    rng = np.random.default_rng(seed)
+    pclass = rng.choice([1, 2, 3], size=n_rows, p=[0.24, 0.21, 0.55])
+    female = rng.random(n_rows) < 0.35
+    age = np.clip(rng.normal(30, 14, n_rows), 0.42, 80).round(1)
+    age_missing = rng.random(n_rows) < 0.2
+    sibsp = rng.choice([0, 1, 2, 3, 4, 5, 8], size=n_rows, p=[0.68, 0.235, 0.03, 0.02, 0.02, 0.01, 0.005])
+    parch = rng.choice([0, 1, 2, 3, 4, 5, 6], size=n_rows, p=[0.76, 0.13, 0.09, 0.005, 0.005, 0.005, 0.005])
+    fare_scale = np.array([0.0, 60.0, 20.0, 8.0])[pclass]
+    fare = (fare_scale * rng.lognormal(0.0, 0.6, n_rows)).round(4)
+
+    # names: "Surname, Title. Given"
+    title_index = np.where(female,
+                           rng.choice(len(TITLES), size=n_rows, p=FEMALE_TITLE_P),
+                           rng.choice(len(TITLES), size=n_rows, p=MALE_TITLE_P))
+    name = (pd.Series(SURNAMES[rng.integers(0, len(SURNAMES), n_rows)]) + ', '
+            + pd.Series(TITLES[title_index]) + '. '
+            + pd.Series(GIVEN_NAMES[rng.integers(0, len(GIVEN_NAMES), n_rows)]))
+
+    # tickets are shared by small groups, cabins mostly known in first class
+    ticket_number = rng.integers(100000, 100000 + max(n_rows // 2, 1), n_rows)
+    ticket = pd.Series(ticket_number.astype(str))
+    has_cabin = rng.random(n_rows) < np.array([0.0, 0.8, 0.15, 0.03])[pclass]
+    cabin = (pd.Series(DECKS[rng.integers(0, len(DECKS), n_rows)])
+             + pd.Series(rng.integers(1, 150, n_rows).astype(str))).where(has_cabin)
+
+    embarked = pd.Series(PORTS[rng.choice(3, size=n_rows, p=[0.72, 0.19, 0.09])])
+    embarked = embarked.where(rng.random(n_rows) >= 0.002)
+
+    logit = -0.4 + 2.5 * female - 1.0 * (pclass - 1) - 0.03 * (age - 30) + 0.004 * fare - 0.3 * sibsp
+    survived = (rng.random(n_rows) < 1.0 / (1.0 + np.exp(-logit))).astype(np.int64)
+
+    return pd.DataFrame({
+        'PassengerId': np.arange(first_id, first_id + n_rows),
+        'Survived': survived,
+        'Pclass': pclass,
+        'Name': name,
+        'Sex': np.where(female, 'female', 'male'),
+        'Age': np.where(age_missing, np.nan, age),
+        'SibSp': sibsp,
+        'Parch': parch,
+        'Ticket': ticket,
+        'Fare': fare,
+        'Cabin': cabin,
+        'Embarked': embarked,
+    }, columns=COLUMNS)
+
+
+def write_synthetic_csv(file_path: str, n_rows: int, seed: int, chunk_size: int = 1_000_000) -> None:
+    """Write n_rows synthetic passengers to a CSV file, one chunk in memory at a time."""
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(file_path, 'w', newline='') as file:
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+            rows = min(chunk_size, n_rows - start)
+            chunk = generate_passengers(rows, seed=seed + chunk_index, first_id=start + 1)
+            chunk.to_csv(file, header=(start == 0), index=False)
+
+
+def main():
+    """Write a synthetic Titanic-schema CSV"""
+    parser = argparse.ArgumentParser(description='Synthetic Titanic-schema data generator')
+    parser.add_argument('--rows', type=int, required=True, help='number of passengers')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    parser.add_argument('--output', required=True, help='CSV file to write')
+    args = parser.parse_args()
+    write_synthetic_csv(args.output, args.rows, args.seed)
+
+if __name__ == '__main__':
+    main()
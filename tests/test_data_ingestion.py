@@ -0,0 +1,41 @@
+import pandas as pd
+import numpy as np
+
+from data_ingestion import hash_split_mask
+
+
+def test_hash_split_same_seed_same_split():
+    ids = pd.Series(np.arange(1, 10001), dtype='int32')
+    assert np.array_equal(hash_split_mask(ids, 0.2, 42), hash_split_mask(ids, 0.2, 42))
+
+
+def test_hash_split_seed_changes_split():
+    ids = pd.Series(np.arange(1, 10001), dtype='int32')
+    masks = [hash_split_mask(ids, 0.2, seed) for seed in (42, 7, 12345)]
+    assert not np.array_equal(masks[0], masks[1])
+    assert not np.array_equal(masks[0], masks[2])
+    assert not np.array_equal(masks[1], masks[2])
+
+
+def test_hash_split_independent_of_chunking():
+    ids = pd.Series(np.arange(1, 10001), dtype='int32')
+    chunked = np.concatenate([hash_split_mask(ids[i:i + 999], 0.2, 42) for i in range(0, len(ids), 999)])
+    mask = hash_split_mask(ids, 0.2, 42)
+    assert np.array_equal(chunked, mask)
+    assert abs(mask.mean() - 0.2) < 0.02
+
+
+def test_resolve_source_rereads_changed_local_file(tmp_path):
+    from data_ingestion import resolve_source
+    source = tmp_path / 'titanic.csv'
+    cache_dir = str(tmp_path / 'cache')
+    source.write_text('PassengerId,Survived\n1,0\n')
+    first = resolve_source(str(source), cache_dir)
+    assert resolve_source(str(source), cache_dir) == first
+
+    with open(source, 'a') as file:
+        file.write('2,1\n')
+    second = resolve_source(source.as_uri(), cache_dir)
+    assert open(second).read() == 'PassengerId,Survived\n1,0\n2,1\n'
+    # the plain path entry is refreshed as well
+    assert open(resolve_source(str(source), cache_dir)).read() == open(second).read()
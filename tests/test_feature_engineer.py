@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from feature_engineer import FeatureEngineer
+from schema import SchemaError
+
+
+def passengers(sibsp: list, parch: list, tickets: list) -> pd.DataFrame:
+    n = len(sibsp)
+    return pd.DataFrame({'Name': ['Smith, Mr. John'] * n, 'Ticket': tickets, 'Cabin': [None] * n,
+                         'SibSp': sibsp, 'Parch': parch})
+
+
+def test_family_size_of_large_counts_does_not_wrap():
+    frame = passengers([127, 100], [127, 0], ['A', 'B'])
+    engineered = FeatureEngineer().fit(frame).transform(frame)
+    assert engineered['FamilySize'].tolist() == [255, 101]
+    assert engineered['FamilySize'].dtype == 'int16'
+
+
+def test_ticket_group_size_above_int16():
+    frame = passengers([0] * 40000, [0] * 40000, ['SHARED'] * 40000)
+    engineered = FeatureEngineer().fit(frame).transform(frame.iloc[:2])
+    assert engineered['TicketGroupSize'].tolist() == [40000, 40000]
+
+
+def test_out_of_range_count_raises():
+    frame = passengers([0], [0], ['A'])
+    frame['Cabin'] = [' '.join(f'C{i}' for i in range(200))]
+    with pytest.raises(SchemaError):
+        FeatureEngineer().fit(frame).transform(frame)
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from data_io import read_frame
+from incremental import load_state, update_artifact
+
+
+def double_fare(block: pd.DataFrame) -> pd.DataFrame:
+    return block.assign(Fare=block['Fare'] * 2)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_empty_frame_without_state_writes_empty_artifact(tmp_path, extension):
+    path = str(tmp_path / f'train_processed.{extension}')
+    empty = pd.DataFrame({'PassengerId': pd.Series([], dtype='int64'), 'Fare': pd.Series([], dtype='float64')})
+
+    assert update_artifact(empty, path, double_fare, 100, 'fitted') == (0, 0)
+    written = read_frame(path)
+    assert len(written) == 0 and list(written.columns) == ['PassengerId', 'Fare']
+    assert load_state(path)['blocks'] == []
+
+    # the next run with rows starts from the empty artifact
+    frame = pd.DataFrame({'PassengerId': range(250), 'Fare': [1.0] * 250})
+    assert update_artifact(frame, path, double_fare, 100, 'fitted') == (3, 250)
+    assert read_frame(path)['Fare'].tolist() == [2.0] * 250
@@ -0,0 +1,17 @@
+import numpy as np
+
+from instrumentation import StageMonitor
+
+
+def test_peak_rss_is_per_function():
+    monitor = StageMonitor('test')
+    with monitor.track('allocate'):
+        block = np.ones(50 * 2 ** 20 // 8)
+        del block
+    with monitor.track('small'):
+        np.ones(10)
+    allocate, small = (m.as_dict() for m in monitor.measurements)
+    assert allocate['rss_peak_mb'] > 40
+    # the earlier peak is not reported again
+    assert small['rss_peak_mb'] < 10
+    assert monitor.stage_measurement().rss_peak_mb >= allocate['rss_peak_mb']
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from model_building import train_incremental
+
+PARAMS = {
+    'features': ['x'],
+    'incremental': {'epochs': 20, 'alpha': 0.0001, 'tol': 0.0001, 'patience': 2, 'random_state': 42},
+}
+
+
+def halves(frame: pd.DataFrame):
+    half = len(frame) // 2
+    return lambda: iter([frame.iloc[:half], frame.iloc[half:]])
+
+
+def test_rising_loss_stops_unconverged():
+    rng = np.random.default_rng(0)
+    # labels unrelated to the feature, so the progressive loss ends up rising
+    frame = pd.DataFrame({'x': rng.normal(size=2000), 'Survived': rng.integers(0, 2, 2000)})
+    _, report = train_incremental(halves(frame), PARAMS)
+    losses = [epoch['log_loss'] for epoch in report['history']]
+    assert report['stop_reason'] == 'loss_increased' and not report['converged']
+    assert losses[-3] < losses[-2] < losses[-1]
+
+
+def test_small_improvement_converges():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=4000)
+    frame = pd.DataFrame({'x': x, 'Survived': (x + rng.normal(scale=0.5, size=4000) > 0).astype(int)})
+    params = dict(PARAMS, incremental=dict(PARAMS['incremental'], tol=0.01))
+    _, report = train_incremental(halves(frame), params)
+    losses = [epoch['log_loss'] for epoch in report['history']]
+    assert report['stop_reason'] == 'converged' and report['converged']
+    assert 0 <= losses[-2] - losses[-1] < 0.01
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from model_evaluation import bootstrap_intervals
+
+
+def test_bootstrap_intervals_contain_the_point_estimate():
+    conf_matrix = np.array([[90, 10], [20, 60]])
+    result = bootstrap_intervals(conf_matrix, n_resamples=2000, confidence=0.95, seed=42)
+    accuracy = result['intervals']['accuracy']
+    assert accuracy['low'] < 150 / 180 < accuracy['high']
+
+
+def test_bootstrap_intervals_reject_an_empty_test_set():
+    with pytest.raises(ValueError, match='empty test set'):
+        bootstrap_intervals(np.zeros((2, 2), dtype=np.int64), n_resamples=100, confidence=0.95, seed=42)
@@ -0,0 +1,13 @@
+from pipeline import STAGES, code_files
+
+
+def test_stage_code_includes_imported_modules():
+    files = code_files(STAGES['data_preprocessing'][0])
+    assert {'data_preprocessing.py', 'preprocessor.py', 'sketches.py', 'schema.py', 'data_io.py',
+            'incremental.py', 'model_files.py'} <= set(files)
+    assert 'log_config.py' not in files and 'pipeline.py' not in files
+
+
+def test_stage_code_follows_imports_of_imports():
+    # model_evaluation -> model_building -> parallel
+    assert 'parallel.py' in code_files(STAGES['model_evaluation'][0])
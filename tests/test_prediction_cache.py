@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from prediction_cache import PredictionCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows_scored = 0
+
+    def predict(self, X):
+        self.rows_scored += len(X)
+        return (np.asarray(X)[:, 0] > 1).astype(int)
+
+
+def test_repeats_of_a_new_row_are_not_hits():
+    model = CountingModel()
+    cache = PredictionCache(model)
+    batch = pd.DataFrame({'Pclass': [1, 1, 1, 3], 'Fare': [7.25, 7.25, 7.25, 8.05]})
+
+    assert cache.predict(batch).tolist() == [0, 0, 0, 1]
+    assert (cache.hits, cache.misses, model.rows_scored) == (0, 4, 2)
+
+    assert cache.predict(batch).tolist() == [0, 0, 0, 1]
+    assert (cache.hits, cache.misses, model.rows_scored) == (4, 4, 2)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from serve import MicroBatcher, _passenger_records
+
+FIELDS = ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked']
+PASSENGER = {'Pclass': 3, 'Sex': 'male', 'Age': 22, 'SibSp': 1, 'Parch': 0, 'Fare': 7.25, 'Embarked': 'S'}
+
+
+@pytest.mark.parametrize('bad', [{'Sex': 'M'}, {'Age': 'abc'}, {'Pclass': 300}, {'Pclass': None}])
+def test_bad_values_are_rejected(bad):
+    with pytest.raises(ValueError):
+        _passenger_records(dict(PASSENGER, **bad), ['Pclass', 'Sex', 'SibSp', 'Parch', 'Fare'], FIELDS)
+
+
+def test_values_are_coerced():
+    records = _passenger_records(dict(PASSENGER, Age='30', Pclass='1'), ['Pclass', 'Sex'], FIELDS)
+    assert records[0]['Age'] == 30.0 and records[0]['Pclass'] == 1
+
+
+def test_failing_request_does_not_fail_its_batch():
+    def score_fn(frame: pd.DataFrame) -> pd.DataFrame:
+        if (frame['Fare'] < 0).any():
+            raise ValueError('bad fare')
+        return pd.DataFrame({'Survived': (frame['Fare'] > 10).astype(int)})
+
+    async def run():
+        batcher = MicroBatcher(score_fn, FIELDS, max_batch_size=100, max_wait_ms=50)
+        batcher.start()
+        fares = [5.0, 20.0, -1.0, 30.0]
+        results = await asyncio.gather(*[batcher.submit([dict(PASSENGER, Fare=fare)]) for fare in fares],
+                                       return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert results[0] == [{'Survived': 0}]
+    assert results[1] == [{'Survived': 1}]
+    assert isinstance(results[2], ValueError)
+    assert results[3] == [{'Survived': 1}]